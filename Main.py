@@ -1,83 +1,99 @@
 import streamlit as st
-import requests
 from streamlit_cookies_controller import CookieController
-import time
+from utils.api_client import api_post
+from utils.config import PROFILING_ENABLED, TRACE_PANEL
+from utils.cookies import apply_pending_cookies, remove_cookie, set_cookie
+from utils.data import load_user_role
+from utils.flash import flash, show_flashes
+from utils.keepwarm import start_keep_warm
+from utils.outbox import start_outbox_worker
+from utils.profiling import profile_page, profiling_requested, render_profile_viewer
+from utils.tracing import render_timing_panel, set_trace_tags, span, start_trace
+from utils.warmup import record_first_render
 
 # Configuración de la página
 st.set_page_config(layout="wide")
 
+# Iniciar la traza de latencia de esta ejecución
+start_trace()
+
+# Mantener despierto el backend con pings periódicos (un solo hilo por proceso)
+start_keep_warm()
+
+# Enviar en segundo plano las escrituras pendientes (incluidas las que quedaron de una ejecución anterior)
+start_outbox_worker()
+
 cookie_controller = CookieController()
 
-# URL de la API de login y de usuarios
-API_URL_LOGIN = "https://tesis-backend-nxpy.onrender.com/login"
-API_URL_USER = "https://tesis-backend-nxpy.onrender.com/user"
+# Escribir en el navegador los cambios de cookies pendientes de la ejecución anterior
+apply_pending_cookies(cookie_controller)
+
+# Endpoint de la API de login
+API_URL_LOGIN = "/login"
 
 # Función para verificar credenciales en la API
 def check_credentials(email, password):
     try:
-        response = requests.post(API_URL_LOGIN, json={"email": email, "password": password})
+        response = api_post(API_URL_LOGIN, json={"email": email, "password": password})
         
         if response.status_code == 200:
             data = response.json()
             
             if data.get("success"):
-                return True, data.get("message"), data.get("user_id")
+                # El rol puede venir incluido en la respuesta del login
+                return True, data.get("message"), data.get("user_id"), data.get("role")
             else:
-                return False, data.get("message"), None
+                return False, data.get("message"), None, None
         else:
-            return False, "Error al comunicarse con la API.", None
+            return False, "Error al comunicarse con la API.", None, None
     except Exception as e:
-        return False, f"Ocurrió un error: {e}", None
+        return False, f"Ocurrió un error: {e}", None, None
 
-# Función para obtener el rol del usuario filtrando por user_id
-def get_user_role(user_id):
+# Función para obtener el rol del usuario consultando solo ese user_id (`fallback` si el backend no responde)
+def get_user_role(user_id, fallback=None):
     try:
-        response = requests.get(API_URL_USER)
-        
-        if response.status_code == 200:
-            data = response.json()
-            user = next((user for user in data if user["id"] == user_id), None)
-            if user:
-                return user.get("role")
-            else:
-                return None
-        else:
-            return None
+        return load_user_role(user_id, fallback)
     except Exception as e:
-        return None
+        return fallback
 
 # Función de logout
 def logout():
-    # Limpiar las cookies
-    cookie_controller.remove("user_id")
-    cookie_controller.remove("role")
-
     # Limpiar el session state
     st.session_state.clear()  # Limpia todas las variables del session_state
-    
-    time.sleep(2)
+
+    # Conservar una copia vacía de las cookies para no volver a leerlas del navegador antes de que se eliminen
+    st.session_state["cookies"] = {}
+
+    # Limpiar las cookies (se eliminan del navegador en la siguiente ejecución)
+    remove_cookie(cookie_controller, "user_id")
+    remove_cookie(cookie_controller, "role")
+
+    flash("Sesión cerrada.", "info")
 
 # Página de inicio de sesión
 def login_page():
     st.title("Iniciar Sesión")
+    show_flashes()
     email = st.text_input("Correo electrónico")
     password = st.text_input("Contraseña", type="password")
     
     if st.button("Iniciar Sesión"):
-        success, message, user_id = check_credentials(email, password)
+        success, message, user_id, role = check_credentials(email, password)
         if success:
-            role = get_user_role(user_id)
-            cookie_controller.set('user_id', user_id)
-            cookie_controller.set('role', role)
-            st.success(message)
-            time.sleep(0.5)
+            # Solo se consulta el rol si el login no lo devolvió
+            if role is None:
+                role = get_user_role(user_id)
+            set_cookie(cookie_controller, 'user_id', user_id)
+            set_cookie(cookie_controller, 'role', role)
+            flash(message)
             st.rerun()  # Redirigir a la página principal después del login
         else:
             st.error(message)
 
 # Página de inicio de sesión si no está autenticado
 if cookie_controller.get('user_id'):
-    user_role = cookie_controller.get('role')  # Obtener el rol del usuario desde las cookies
+    # Obtener el rol del usuario desde la caché de roles sin bloquear la página (la cookie solo se usa si el backend no responde)
+    user_role = get_user_role(cookie_controller.get('user_id'), cookie_controller.get('role'))
 
     # Definición de las páginas
     cost_estimations_page = st.Page(
@@ -92,7 +108,13 @@ if cookie_controller.get('user_id'):
         icon=":material/price_change:"
     )
 
-    pages = [cost_estimations_page, requests_page]  # Por defecto, estas siempre están disponibles
+    dashboard_page = st.Page(
+        page="views/dashboard.py",
+        title="Panel de Costos",
+        icon=":material/monitoring:"
+    )
+
+    pages = [cost_estimations_page, requests_page, dashboard_page]  # Por defecto, estas siempre están disponibles
     
     if user_role == 'admin':
         users_page = st.Page(
@@ -113,9 +135,30 @@ if cookie_controller.get('user_id'):
         logout() 
         st.rerun()
 
+    # Mostrar los mensajes pendientes de la ejecución anterior
+    show_flashes()
+
+    # Perfilar la página con cProfile solo para administradores (?profile=1 en la URL o interruptor de la barra lateral)
+    profiling = PROFILING_ENABLED and user_role == 'admin' and profiling_requested()
+
     # Ejecutar navegación
-    menu.run()
+    set_trace_tags(page=menu.title, role=user_role)
+    with span("render.page"), profile_page(menu.title, profiling):
+        menu.run()
+
+    record_first_render(menu.title)
+
+    # Mostrar los tiempos de la ejecución solo a los administradores
+    if TRACE_PANEL and user_role == 'admin':
+        render_timing_panel()
+
+    # Mostrar las capturas del perfilado de CPU
+    if PROFILING_ENABLED and user_role == 'admin':
+        render_profile_viewer()
 
 else:
-    login_page()
+    set_trace_tags(page="login", role=None)
+    with span("render.page"):
+        login_page()
+    record_first_render("login")
     
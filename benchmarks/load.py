@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import requests
+
+from benchmarks.run import ROOT, _free_port, isolated_app_env, start_mock_backend
+from benchmarks.streamlit_client import StreamlitClientError, StreamlitSession
+
+# Prueba de carga con varias sesiones simultáneas sobre el servidor de Streamlit.
+# Levanta el backend de pruebas y `streamlit run Main.py`, y simula N navegadores por el websocket
+# de Streamlit: inicio de sesión, listado de estimaciones, búsqueda, cambios de página y envío de
+# una solicitud de eliminación. Por cada nivel de concurrencia informa el rendimiento (ejecuciones
+# del script por segundo), los percentiles p50/p95/p99 de la latencia de cada ejecución y el uso
+# de CPU y memoria residente del servidor (leídos de /proc).
+#
+# Uso (desde la raíz del repositorio):
+#   python -m benchmarks.load --concurrency 1 5 10 25 --size 10000 --latency-ms 50
+
+MOCK_USER_PASSWORD = "usuario"
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+# Función para levantar el servidor de Streamlit y esperar a que responda.
+# Con `prewarm` se usa serve.py, que precarga módulos y cachés al iniciar.
+# Cada servidor usa sus propios archivos locales temporales (ver `isolated_app_env`).
+def start_streamlit_server(port, backend_url, prewarm=False):
+    env = {**os.environ, **isolated_app_env(), "BACKEND_URL": backend_url}
+    command = ["serve.py"] if prewarm else ["-m", "streamlit", "run", "Main.py"]
+    process = subprocess.Popen(
+        [
+            sys.executable, *command,
+            "--server.headless", "true",
+            "--server.port", str(port),
+            "--server.fileWatcherType", "none",
+            "--browser.gatherUsageStats", "false",
+        ],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("el servidor de Streamlit terminó al iniciar")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/_stcore/health", timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("el servidor de Streamlit no respondió a tiempo")
+
+# Función para leer el tiempo de CPU (en segundos) y la memoria residente (en MB) de un proceso
+def read_process_usage(pid):
+    with open(f"/proc/{pid}/stat") as stat_file:
+        fields = stat_file.read().rsplit(")", 1)[1].split()
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    rss_mb = 0.0
+    with open(f"/proc/{pid}/status") as status_file:
+        for line in status_file:
+            if line.startswith("VmRSS:"):
+                rss_mb = int(line.split()[1]) / 1024
+                break
+    return cpu_seconds, rss_mb
+
+# Función para simular un navegador: devuelve una lista de (acción, latencia en ms)
+async def run_session(url, number, n_users, page_flips):
+    session = StreamlitSession(url)
+    timings = []
+
+    async def step(action, values=None, **kwargs):
+        timings.append((action, await session.rerun(values, **kwargs)))
+        if session.exceptions:
+            raise StreamlitClientError(f"{action}: {session.exceptions[0]}")
+
+    await session.connect()
+    try:
+        await step("first_load")
+
+        # Cada sesión entra con uno de los usuarios del backend de pruebas (usuario2, usuario3, ...)
+        email_id, _ = session.find("text_input", label="Correo electrónico")
+        password_id, _ = session.find("text_input", label="Contraseña")
+        login_id, _ = session.find("button", label="Iniciar Sesión")
+        await step("login", {
+            email_id: f"usuario{2 + number % max(n_users - 1, 1)}@example.com",
+            password_id: MOCK_USER_PASSWORD,
+            login_id: True,
+        })
+
+        search_id, _ = session.find("text_input", key="search")
+        await step("search", {search_id: "be"})
+        search_id, _ = session.find("text_input", key="search")
+        await step("search", {search_id: ""})
+
+        for _ in range(page_flips):
+            page_id, page_input = session.find("number_input", key="estimations_page_selector")
+            await step("page_flip", {page_id: page_input.default + 1 if page_input.default < page_input.max else 1})
+
+        delete_buttons = session.find_buttons("delete_")
+        if delete_buttons:
+            await step("submit_request", {delete_buttons[0]: True})
+
+        await step("open_requests", page_script_hash=session.pages["Solicitudes de Cambio"])
+    finally:
+        session.close()
+    return timings
+
+# Función para ejecutar un nivel de concurrencia y resumir sus resultados
+async def run_level(url, server_pid, concurrency, n_users, page_flips):
+    samples = []
+
+    async def sample_usage():
+        while True:
+            samples.append(read_process_usage(server_pid))
+            await asyncio.sleep(0.5)
+
+    cpu_start, _ = read_process_usage(server_pid)
+    sampler = asyncio.ensure_future(sample_usage())
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_session(url, number, n_users, page_flips) for number in range(concurrency)),
+        return_exceptions=True
+    )
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    cpu_end, rss_end = read_process_usage(server_pid)
+
+    latencies = np.array([latency for result in results if not isinstance(result, BaseException) for _, latency in result])
+    errors = [repr(result) for result in results if isinstance(result, BaseException)]
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (float("nan"),) * 3
+    return {
+        "concurrency": concurrency,
+        "reruns": int(len(latencies)),
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+        "cpu_percent": round((cpu_end - cpu_start) / elapsed * 100, 1),
+        "rss_max_mb": round(max([rss for _, rss in samples] + [rss_end]), 1),
+    }
+
+def print_level(result):
+    print(
+        f"{result['concurrency']:>6} {result['reruns']:>8} {result['errors']:>7} {result['throughput_rps']:>10.2f}"
+        f" {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f}"
+        f" {result['cpu_percent']:>7.1f} {result['rss_max_mb']:>9.1f}",
+        flush=True
+    )
+    for error in result["error_samples"]:
+        print(f"        error: {error}")
+
+async def run_levels(url, server_pid, args):
+    results = []
+    print(f"{'sesiones':>6} {'ejecuc.':>8} {'errores':>7} {'ejec./s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'CPU %':>7} {'RSS MB':>9}")
+    for concurrency in args.concurrency:
+        result = await run_level(url, server_pid, concurrency, args.users, args.page_flips)
+        print_level(result)
+        results.append(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga con varias sesiones simultáneas de Streamlit.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 5, 10, 25], help="sesiones simultáneas por nivel")
+    parser.add_argument("--size", type=int, default=10000, help="número de estimaciones y solicitudes del backend de pruebas")
+    parser.add_argument("--users", type=int, default=20, help="número de usuarios del backend de pruebas")
+    parser.add_argument("--latency-ms", type=int, default=0, help="latencia artificial del backend de pruebas")
+    parser.add_argument("--page-flips", type=int, default=3, help="cambios de página por sesión")
+    parser.add_argument("--output", type=Path, help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    backend_port, app_port = _free_port(), _free_port()
+    os.environ["MOCK_USERS"] = str(args.users)
+    backend = start_mock_backend(backend_port, args.size, args.latency_ms)
+    try:
+        server = start_streamlit_server(app_port, f"http://127.0.0.1:{backend_port}")
+        try:
+            results = asyncio.run(run_levels(f"ws://127.0.0.1:{app_port}/_stcore/stream", server.pid, args))
+        finally:
+            server.terminate()
+            server.wait()
+    finally:
+        backend.terminate()
+        backend.wait()
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    return 0 if all(result["errors"] == 0 for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+# Benchmark de las vistas contra el backend local de pruebas (mock_backend).
+# Por cada tamaño de datos se levanta el backend con ese número de estimaciones y solicitudes,
+# se ejecutan los escenarios con AppTest y se comparan los resultados con la línea base guardada.
+#
+# Uso (desde la raíz del repositorio):
+#   python -m benchmarks.run                      # 1k, 10k y 100k registros, compara con la línea base
+#   python -m benchmarks.run --sizes 1000 --latency-ms 150
+#   python -m benchmarks.run --update-baseline    # guarda los resultados como nueva línea base
+#
+# El proceso termina con código 1 si alguna medición empeora más que la tolerancia.
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# Margen absoluto para no marcar como regresión el ruido de mediciones muy cortas
+MIN_WALL_DELTA_MS = 50.0
+MIN_PEAK_DELTA_KB = 1024.0
+
+# Función para obtener un puerto libre para el backend de pruebas
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+# Función para obtener las variables de entorno que aíslan los archivos locales de la aplicación medida:
+# la base de datos local (copia de los listados y cola de escrituras) y la instantánea van a una carpeta
+# temporal, y la copia local de los listados se desactiva. Así el benchmark no deja datos del backend de
+# pruebas ni escrituras pendientes en los archivos que usa la aplicación real.
+def isolated_app_env():
+    directory = tempfile.mkdtemp(prefix="benchmark-")
+    return {
+        "LOCAL_DB_PATH": os.path.join(directory, "local.db"),
+        "SNAPSHOT_DIR": os.path.join(directory, "snapshot"),
+        "LOCAL_MIRROR": "false",
+    }
+
+# Función para levantar el backend de pruebas con un tamaño de datos y esperar a que responda
+def start_mock_backend(port, size, latency_ms):
+    env = {
+        **os.environ,
+        "MOCK_ESTIMATIONS": str(size),
+        "MOCK_REQUESTS": str(size),
+        "MOCK_LATENCY_MS": str(latency_ms),
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "mock_backend.app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env
+    )
+    # Cada respuesta tarda al menos la latencia simulada: se espera esa latencia más un margen
+    probe_timeout = latency_ms / 1000 + 1
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("el backend de pruebas terminó al iniciar")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/user", timeout=probe_timeout)
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("el backend de pruebas no respondió a tiempo")
+
+# Función para ejecutar todos los escenarios de un tamaño de datos.
+# El tiempo es la mediana de las repeticiones; la memoria se mide en una pasada aparte
+# con tracemalloc, que también hace más lento el código medido.
+def run_size(scenarios, repeats):
+    from benchmarks.scenarios import run_scenario
+
+    results = {}
+    for name in scenarios:
+        timings = [run_scenario(name) for _ in range(repeats)]
+        memory = run_scenario(name, trace_memory=True)
+        for interaction in memory:
+            results[f"{name}/{interaction}"] = {
+                "wall_ms": round(statistics.median(timing[interaction]["wall_ms"] for timing in timings), 2),
+                "peak_kb": round(memory[interaction]["peak_kb"], 1),
+            }
+    return results
+
+# Función para comparar los resultados con la línea base y devolver las regresiones encontradas
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric, min_delta in (("wall_ms", MIN_WALL_DELTA_MS), ("peak_kb", MIN_PEAK_DELTA_KB)):
+            value, reference = result[metric], base[metric]
+            if value > reference * (1 + tolerance) and value - reference > min_delta:
+                regressions.append(f"{key} {metric}: {value:,.1f} (línea base {reference:,.1f})")
+    return regressions
+
+# Función para mostrar los resultados en forma de tabla
+def print_results(results, baseline):
+    print(f"{'medición':<45} {'tiempo (ms)':>12} {'base':>10} {'memoria (KB)':>14} {'base':>12}")
+    for key, result in results.items():
+        base = baseline.get(key, {})
+        print(
+            f"{key:<45} {result['wall_ms']:>12,.1f} {base.get('wall_ms', float('nan')):>10,.1f}"
+            f" {result['peak_kb']:>14,.1f} {base.get('peak_kb', float('nan')):>12,.1f}"
+        )
+
+def main():
+    from benchmarks.scenarios import SCENARIOS
+
+    parser = argparse.ArgumentParser(description="Benchmark de las vistas contra el backend de pruebas.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="número de estimaciones y solicitudes")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--latency-ms", type=int, default=0, help="latencia artificial del backend de pruebas")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="empeoramiento relativo permitido")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # La aplicación lee la configuración al importar utils.config, antes de ejecutar la primera página.
+    # Sin copia local de los listados: serviría en la primera carga los datos de otro tamaño o de la
+    # repetición anterior, en lugar de medir la descarga.
+    port = _free_port()
+    os.environ["BACKEND_URL"] = f"http://127.0.0.1:{port}"
+    os.environ.update(isolated_app_env())
+    os.chdir(ROOT)
+
+    from benchmarks.scenarios import install_cookie_controller
+    install_cookie_controller()
+
+    # La línea base es por latencia del backend; los tamaños se guardan por separado
+    baseline_file = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    baseline_key = f"latency_{args.latency_ms}ms"
+    baseline = baseline_file.get(baseline_key, {})
+
+    results = {}
+    for size in args.sizes:
+        process = start_mock_backend(port, size, args.latency_ms)
+        try:
+            print(f"== {size} registros ==", flush=True)
+            size_results = {f"{size}/{key}": value for key, value in run_size(args.scenarios, args.repeats).items()}
+        finally:
+            process.terminate()
+            process.wait()
+        print_results(size_results, baseline)
+        results.update(size_results)
+
+    if args.update_baseline:
+        baseline_file[baseline_key] = {**baseline, **results}
+        args.baseline.write_text(json.dumps(baseline_file, indent=2, sort_keys=True) + "\n")
+        print(f"Línea base guardada en {args.baseline}")
+        return 0
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    if regressions:
+        print("Regresiones:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("Sin regresiones respecto a la línea base.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import time
+import tracemalloc
+
+import streamlit as st
+import streamlit_cookies_controller
+from streamlit.testing.v1 import AppTest
+
+# Escenarios del benchmark: cada uno ejecuta una página con el arnés de pruebas de Streamlit
+# (AppTest) y mide el tiempo y la memoria máxima de cada interacción del usuario.
+
+ADMIN_EMAIL = "admin@example.com"
+ADMIN_PASSWORD = "admin"
+ADMIN_USER_ID = f"{1:024x}"
+
+# Tiempo máximo de una ejecución del script (la primera carga de 100k registros es lenta)
+SCRIPT_TIMEOUT = 300
+
+# Controlador de cookies en memoria: el componente real necesita un navegador
+class BenchmarkCookieController:
+    cookies = {}
+
+    def __init__(self, key="cookies"):
+        pass
+
+    def get(self, name):
+        return self.cookies.get(name)
+
+    def getAll(self):
+        return self.cookies
+
+    def set(self, name, value, **kwargs):
+        self.cookies[name] = value
+
+    def remove(self, name, **kwargs):
+        self.cookies.pop(name, None)
+
+# Función para reemplazar el controlador de cookies en las páginas que se ejecutan en este proceso
+def install_cookie_controller():
+    streamlit_cookies_controller.CookieController = BenchmarkCookieController
+
+class BenchmarkError(Exception):
+    pass
+
+# Registro de las mediciones de un escenario
+class Recorder:
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.results = {}
+
+    # Función para ejecutar una interacción y guardar su tiempo y su memoria máxima
+    # (memoria reservada durante la interacción por encima de la que ya estaba en uso)
+    def measure(self, name, action):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            in_use = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        at = action()
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        if at.exception:
+            raise BenchmarkError(f"{name}: {at.exception[0].value}")
+
+        result = {"wall_ms": wall_ms}
+        if self.trace_memory:
+            result["peak_kb"] = (tracemalloc.get_traced_memory()[1] - in_use) / 1024
+        self.results[name] = result
+        return at
+
+# Función para obtener un botón por su texto
+def _button(at, label):
+    matches = [button for button in at.button if button.label == label]
+    if not matches:
+        raise BenchmarkError(f"no se encontró el botón '{label}'")
+    return matches[0]
+
+# Función para crear una página nueva del arnés con la sesión de un administrador
+def _admin_page(path):
+    BenchmarkCookieController.cookies = {"user_id": ADMIN_USER_ID, "role": "admin"}
+    return AppTest.from_file(path, default_timeout=SCRIPT_TIMEOUT)
+
+def login_scenario(recorder):
+    BenchmarkCookieController.cookies = {}
+    at = AppTest.from_file("Main.py", default_timeout=SCRIPT_TIMEOUT)
+    recorder.measure("first_load", at.run)
+
+    at.text_input[0].input(ADMIN_EMAIL)
+    at.text_input[1].input(ADMIN_PASSWORD)
+    recorder.measure("login", _button(at, "Iniciar Sesión").click().run)
+
+def estimations_scenario(recorder):
+    at = _admin_page("views/cost_estimations.py")
+    recorder.measure("first_load", at.run)
+    recorder.measure("search_keystroke", at.text_input(key="search").input("be").run)
+    at.text_input(key="search").input("").run()
+    recorder.measure("page_flip", at.number_input(key="estimations_page_selector").increment().run)
+
+    _button(at, "Crear Estimación").click().run()
+    at.number_input[0].set_value(12.5)
+    at.number_input[1].set_value(80.0)
+    recorder.measure("create", _button(at, "Guardar").click().run)
+
+def requests_scenario(recorder):
+    at = _admin_page("views/requests.py")
+    recorder.measure("first_load", at.run)
+    recorder.measure("search_keystroke", at.text_input(key="search").input("Pe").run)
+    at.text_input(key="search").input("").run()
+    recorder.measure("page_flip", at.number_input(key="requests_page_selector").increment().run)
+
+    # Filtrar las pendientes para tener siempre una solicitud que aprobar en la página
+    at.text_input(key="search").input("Pendiente").run()
+    approve = [button for button in at.button if button.key and button.key.startswith("approve_")]
+    if not approve:
+        raise BenchmarkError("no hay solicitudes pendientes para aprobar")
+    recorder.measure("approve", approve[0].click().run)
+
+def users_scenario(recorder):
+    at = _admin_page("views/users.py")
+    recorder.measure("first_load", at.run)
+    recorder.measure("search_keystroke", at.text_input(key="search").input("us").run)
+    at.text_input(key="search").input("").run()
+    recorder.measure("page_flip", at.number_input(key="users_page_selector").increment().run)
+
+SCENARIOS = {
+    "login": login_scenario,
+    "estimations": estimations_scenario,
+    "requests": requests_scenario,
+    "users": users_scenario,
+}
+
+# Función para vaciar las cachés del proceso, para que cada repetición empiece en frío
+def reset_caches():
+    from utils import data
+
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+    # Descargas anteriores que la capa de datos conserva aparte para servirlas si el backend no responde
+    data._last_good.clear()
+    data._in_flight.clear()
+
+# Función para ejecutar un escenario y devolver sus mediciones
+def run_scenario(name, trace_memory=False):
+    reset_caches()
+    recorder = Recorder(trace_memory)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        SCENARIOS[name](recorder)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return recorder.results
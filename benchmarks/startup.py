@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import sys
+import time
+
+from benchmarks.load import MOCK_USER_PASSWORD, start_streamlit_server
+from benchmarks.run import _free_port, start_mock_backend
+from benchmarks.streamlit_client import StreamlitSession
+
+# Tiempo hasta el primer renderizado después de un despliegue.
+# Levanta el servidor en frío (con `streamlit run Main.py` y con serve.py, que precarga en segundo
+# plano), espera a que responda y a que llegue el primer visitante (--visit-delay), y mide la
+# página de inicio de sesión y la primera página después del login. Luego repite la visita con
+# una segunda sesión, para comparar la primera visita con las siguientes.
+#
+# Uso (desde la raíz del repositorio):
+#   python -m benchmarks.startup --size 10000 --latency-ms 200 --visit-delay 5
+
+# Función para simular una visita: devuelve (ms de la página de login, ms del login y la primera página)
+async def visit(url):
+    session = StreamlitSession(url)
+    await session.connect()
+    try:
+        login_page_ms = await session.rerun()
+        email_id, _ = session.find("text_input", label="Correo electrónico")
+        password_id, _ = session.find("text_input", label="Contraseña")
+        login_id, _ = session.find("button", label="Iniciar Sesión")
+        first_page_ms = await session.rerun({email_id: "usuario2@example.com", password_id: MOCK_USER_PASSWORD, login_id: True})
+    finally:
+        session.close()
+    return login_page_ms, first_page_ms
+
+# Función para medir un arranque en frío del servidor
+def measure_startup(backend_url, prewarm, visit_delay):
+    port = _free_port()
+    start = time.perf_counter()
+    server = start_streamlit_server(port, backend_url, prewarm=prewarm)
+    try:
+        boot_s = time.perf_counter() - start
+        time.sleep(visit_delay)
+        url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        first = asyncio.run(visit(url))
+        second = asyncio.run(visit(url))
+    finally:
+        server.terminate()
+        server.wait()
+    return boot_s, first, second
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo hasta el primer renderizado con y sin precarga.")
+    parser.add_argument("--size", type=int, default=10000, help="número de estimaciones y solicitudes del backend de pruebas")
+    parser.add_argument("--latency-ms", type=int, default=0, help="latencia artificial del backend de pruebas")
+    parser.add_argument("--visit-delay", type=float, default=5.0, help="segundos entre el arranque y la primera visita")
+    args = parser.parse_args()
+
+    backend_port = _free_port()
+    backend = start_mock_backend(backend_port, args.size, args.latency_ms)
+    try:
+        print(f"{'modo':<10} {'arranque s':>10} {'login 1ª':>10} {'página 1ª':>10} {'login 2ª':>10} {'página 2ª':>10}")
+        for name, prewarm in (("normal", False), ("precarga", True)):
+            boot_s, first, second = measure_startup(f"http://127.0.0.1:{backend_port}", prewarm, args.visit_delay)
+            print(f"{name:<10} {boot_s:>10.2f} {first[0]:>10.1f} {first[1]:>10.1f} {second[0]:>10.1f} {second[1]:>10.1f}", flush=True)
+    finally:
+        backend.terminate()
+        backend.wait()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import json
+import time
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.websocket import websocket_connect
+
+# Cliente mínimo del protocolo websocket de Streamlit, usado por la prueba de carga.
+# Hace lo mismo que el navegador: envía un BackMsg `rerun_script` con el estado de los widgets
+# y lee los ForwardMsg de la ejecución hasta `script_finished`. De los elementos recibidos solo
+# guarda los widgets (por id, etiqueta y clave), para poder escribir en ellos y pulsar botones.
+# También imita al componente de cookies (streamlit_cookies_controller) en el navegador: guarda
+# las cookies de la sesión y responde a `getAll` con una nueva ejecución, como lo hace el componente.
+
+FINISHED_EARLY_FOR_RERUN = ForwardMsg.ScriptFinishedStatus.Value("FINISHED_EARLY_FOR_RERUN")
+
+WIDGET_TYPES = {"button", "text_input", "number_input", "selectbox", "checkbox", "toggle"}
+
+class StreamlitClientError(Exception):
+    pass
+
+class StreamlitSession:
+    def __init__(self, url, timeout=120):
+        self.url = url
+        self.timeout = timeout
+        self.connection = None
+        self.widgets = {}
+        self.pages = {}
+        self.page_script_hash = ""
+        self.exceptions = []
+        self.cookies = {}
+        self._messages = {}
+        self._cookie_components = {}
+
+    async def connect(self):
+        self.connection = await websocket_connect(self.url, subprotocols=["streamlit"])
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+    # Función para buscar un widget por tipo y etiqueta o clave (el id de un widget con clave termina en "-<clave>")
+    def find(self, widget_type, label=None, key=None):
+        for widget_id, (element_type, element) in self.widgets.items():
+            if element_type != widget_type:
+                continue
+            if label is not None and element.label == label:
+                return widget_id, element
+            if key is not None and widget_id.endswith(f"-{key}"):
+                return widget_id, element
+        raise StreamlitClientError(f"no se encontró el widget {widget_type} {label or key}")
+
+    # Función para buscar los botones cuya clave empieza con un prefijo (por ejemplo, "delete_")
+    def find_buttons(self, key_prefix):
+        return [widget_id for widget_id, (element_type, _) in self.widgets.items() if element_type == "button" and f"-{key_prefix}" in widget_id]
+
+    # Función para ejecutar el script con los valores de widgets indicados y esperar a que termine.
+    # `values` es un diccionario {id del widget: valor}; los botones se pulsan con el valor True.
+    # Devuelve la duración de la ejecución en milisegundos.
+    async def rerun(self, values=None, page_script_hash=None):
+        if page_script_hash is not None:
+            self.page_script_hash = page_script_hash
+
+        message = BackMsg()
+        message.rerun_script.page_script_hash = self.page_script_hash
+        for widget_id, value in (values or {}).items():
+            state = message.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            self._set_state_value(state, widget_id, value)
+
+        start = time.perf_counter()
+        await self._send(message)
+
+        # El componente de cookies envía su valor en cuanto aparece, lo que provoca otra ejecución
+        while self._pending_cookie_components():
+            message = BackMsg()
+            message.rerun_script.page_script_hash = self.page_script_hash
+            await self._send(message)
+        return (time.perf_counter() - start) * 1000
+
+    async def _send(self, message):
+        for widget_id in self._cookie_components:
+            state = message.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            state.json_value = json.dumps(self.cookies)
+            self._cookie_components[widget_id] = True
+        await self.connection.write_message(message.SerializeToString(), binary=True)
+        await self._read_until_finished()
+
+    def _pending_cookie_components(self):
+        return [widget_id for widget_id, sent in self._cookie_components.items() if not sent]
+
+    # Función para aplicar en las cookies de la sesión lo que el componente haría en el navegador
+    def _handle_component(self, component):
+        if not component.component_name.endswith("cookie_controller"):
+            return
+        args = json.loads(component.json_args or "{}")
+        method = args.get("method")
+        if method == "getAll":
+            self._cookie_components.setdefault(component.id, False)
+        elif method == "set":
+            self.cookies[args["name"]] = args["value"]
+        elif method == "remove":
+            self.cookies.pop(args["name"], None)
+
+    # Función para cambiar a otra página de st.navigation por su título
+    async def open_page(self, page_name):
+        if page_name not in self.pages:
+            raise StreamlitClientError(f"no existe la página {page_name}")
+        return await self.rerun(page_script_hash=self.pages[page_name])
+
+    def _set_state_value(self, state, widget_id, value):
+        element_type, element = self.widgets[widget_id]
+        if element_type == "button":
+            state.trigger_value = bool(value)
+        elif element_type == "text_input":
+            state.string_value = value
+        elif element_type == "number_input":
+            if element.data_type == element.INT:
+                state.int_value = int(value)
+            else:
+                state.double_value = float(value)
+        elif element_type in ("checkbox", "toggle"):
+            state.bool_value = bool(value)
+        elif element_type == "selectbox":
+            state.int_value = int(value)
+
+    async def _read_until_finished(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            if time.monotonic() > deadline:
+                raise StreamlitClientError("la ejecución del script no terminó a tiempo")
+            raw = await self.connection.read_message()
+            if raw is None:
+                raise StreamlitClientError("el servidor cerró la conexión")
+
+            message = ForwardMsg()
+            message.ParseFromString(raw)
+            if message.HasField("ref_hash"):
+                # Mensaje ya enviado antes en esta sesión: se toma de los recibidos
+                message = self._messages.get(message.ref_hash, message)
+            elif message.hash:
+                self._messages[message.hash] = message
+
+            kind = message.WhichOneof("type")
+            if kind == "new_session":
+                self.widgets = {}
+                self.exceptions = []
+            elif kind == "navigation":
+                self.pages = {page.page_name: page.page_script_hash for page in message.navigation.app_pages}
+                self.page_script_hash = message.navigation.page_script_hash
+            elif kind == "delta" and message.delta.HasField("new_element"):
+                element = message.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type in WIDGET_TYPES:
+                    widget = getattr(element, element_type)
+                    self.widgets[widget.id] = (element_type, widget)
+                elif element_type == "component_instance":
+                    self._handle_component(element.component_instance)
+                elif element_type == "exception":
+                    self.exceptions.append(element.exception.message)
+            elif kind == "script_finished" and message.script_finished != FINISHED_EARLY_FOR_RERUN:
+                return
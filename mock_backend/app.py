@@ -0,0 +1,176 @@
+import asyncio
+import threading
+
+from decouple import config
+from fastapi import Body, FastAPI, Header, HTTPException, Request, Response
+
+from mock_backend.seed import generate_dataset, make_id, synthetic_cost
+
+# Backend local de pruebas que imita los endpoints del backend real.
+# Ejecutar con:  uvicorn mock_backend.app:app --port 8000
+# y apuntar la aplicación a él con BACKEND_URL=http://localhost:8000
+
+MOCK_USERS = config("MOCK_USERS", default=20, cast=int)
+MOCK_ESTIMATIONS = config("MOCK_ESTIMATIONS", default=1000, cast=int)
+MOCK_REQUESTS = config("MOCK_REQUESTS", default=200, cast=int)
+MOCK_SEED = config("MOCK_SEED", default=42, cast=int)
+
+# Latencia artificial agregada a cada respuesta (en milisegundos), para simular el backend remoto
+MOCK_LATENCY_MS = config("MOCK_LATENCY_MS", default=0, cast=int)
+
+app = FastAPI(title="Backend local de pruebas")
+
+_lock = threading.Lock()
+_users, _estimations, _requests = generate_dataset(MOCK_USERS, MOCK_ESTIMATIONS, MOCK_REQUESTS, MOCK_SEED)
+_next_id = [3_000_000]
+
+# Middleware para simular la latencia de red del backend remoto
+@app.middleware("http")
+async def add_latency(request: Request, call_next):
+    if MOCK_LATENCY_MS > 0:
+        await asyncio.sleep(MOCK_LATENCY_MS / 1000)
+    return await call_next(request)
+
+# Secuencia de cambios de las estimaciones, usada como marca para la sincronización incremental
+_sequence = [1]
+_estimation_updates = {estimation["id"]: 1 for estimation in _estimations}
+_estimation_deletions = {}
+
+# Función para registrar un cambio (creación, edición o eliminación) de una estimación
+def _touch_estimation(estimation_id, deleted=False):
+    with _lock:
+        _sequence[0] += 1
+        if deleted:
+            _estimation_updates.pop(estimation_id, None)
+            _estimation_deletions[estimation_id] = _sequence[0]
+        else:
+            _estimation_updates[estimation_id] = _sequence[0]
+
+# Función para generar un nuevo identificador
+def _new_id():
+    with _lock:
+        _next_id[0] += 1
+        return make_id(_next_id[0])
+
+# Respuestas ya enviadas por clave de idempotencia (encabezado Idempotency-Key)
+_idempotent_responses = {}
+
+# Función para ejecutar una escritura una sola vez por clave de idempotencia (los reintentos reciben la misma respuesta)
+def _once(idempotency_key, create):
+    if idempotency_key is None:
+        return create()
+    with _lock:
+        if idempotency_key in _idempotent_responses:
+            return _idempotent_responses[idempotency_key]
+    result = create()
+    with _lock:
+        return _idempotent_responses.setdefault(idempotency_key, result)
+
+# Función para buscar un registro por id
+def _find(records, record_id):
+    record = next((record for record in records if record["id"] == record_id), None)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Registro no encontrado")
+    return record
+
+@app.post("/login")
+def login(credentials: dict = Body(...)):
+    user = next((user for user in _users if user["email"] == credentials.get("email")), None)
+    if user is None or user["password"] != credentials.get("password"):
+        return {"success": False, "message": "Credenciales incorrectas."}
+    return {"success": True, "message": "Inicio de sesión exitoso.", "user_id": user["id"], "role": user["role"]}
+
+@app.get("/user")
+def list_users():
+    return _users
+
+@app.get("/user/{user_id}")
+def get_user(user_id: str):
+    return _find(_users, user_id)
+
+@app.post("/user/create")
+def create_user(user: dict = Body(...)):
+    user = {**user, "id": _new_id()}
+    _users.append(user)
+    return user
+
+@app.put("/user/{user_id}")
+def update_user(user_id: str, user: dict = Body(...)):
+    record = _find(_users, user_id)
+    record.update({key: value for key, value in user.items() if key != "id"})
+    return record
+
+@app.delete("/user/{user_id}")
+def delete_user(user_id: str):
+    _users.remove(_find(_users, user_id))
+    return {"success": True}
+
+@app.get("/estimation")
+def list_estimations(response: Response, page: int = None, page_size: int = 10, search: str = "", updated_since: int = None, if_none_match: str = Header(None)):
+    # Sincronización incremental: cambios posteriores a la marca recibida
+    if updated_since is not None:
+        etag = f'"{_sequence[0]}"'
+        if if_none_match == etag:
+            return Response(status_code=304)
+        response.headers["ETag"] = etag
+        return {
+            "items": [estimation for estimation in _estimations if _estimation_updates.get(estimation["id"], 0) > updated_since],
+            "deleted": [estimation_id for estimation_id, sequence in _estimation_deletions.items() if sequence > updated_since],
+            "watermark": _sequence[0],
+        }
+
+    # Sin parámetro de página se devuelve el listado completo (comportamiento del backend real)
+    if page is None:
+        return _estimations
+
+    term = search.lower()
+    if term:
+        matches = [
+            estimation for estimation in _estimations
+            if term in estimation["input_list"]["structureType"].lower()
+            or term in estimation["input_list"]["abutmentType"].lower()
+        ]
+    else:
+        matches = _estimations
+
+    start = (max(page, 1) - 1) * page_size
+    return {"items": matches[start:start + page_size], "total": len(matches)}
+
+@app.post("/estimation/predict")
+def predict(input_list: dict = Body(...), idempotency_key: str = Header(None)):
+    def create():
+        estimation = {"id": _new_id(), "input_list": input_list, "total_Cost": synthetic_cost(input_list)}
+        _estimations.append(estimation)
+        _touch_estimation(estimation["id"])
+        return estimation
+    return _once(idempotency_key, create)
+
+@app.get("/request")
+def list_requests():
+    return _requests
+
+@app.post("/request/create")
+def create_request(request: dict = Body(...), idempotency_key: str = Header(None)):
+    def create():
+        record = {**request, "id": _new_id()}
+        _requests.append(record)
+        return record
+    return _once(idempotency_key, create)
+
+@app.put("/request/{request_id}")
+def update_request(request_id: str, request: dict = Body(...)):
+    record = _find(_requests, request_id)
+    approved = request.get("status") == "Aprobado" and record.get("status") != "Aprobado"
+    record.update({key: value for key, value in request.items() if key != "id"})
+
+    # Al aprobar una solicitud se aplica el cambio a la estimación
+    if approved:
+        estimation = next((estimation for estimation in _estimations if estimation["id"] == record.get("prediction_id")), None)
+        if estimation is not None and record.get("request_type") == "Eliminación":
+            _estimations.remove(estimation)
+            _touch_estimation(estimation["id"], deleted=True)
+        elif estimation is not None and record.get("request_type") == "Edición":
+            estimation["input_list"] = record["new_prediction_object"]["input_list"]
+            estimation["total_Cost"] = record["new_prediction_object"]["total_Cost"]
+            _touch_estimation(estimation["id"])
+    return record
@@ -0,0 +1,93 @@
+import random
+from datetime import date, timedelta
+
+# Generador de datos sintéticos para el backend local de pruebas
+
+STRUCTURE_TYPES = [
+    "adjacent box beams", "arch", "bulb tee", "culvert", "i-beams", "multi girder straight",
+    "next beam", "precast box culvert", "prestressed I-beams", "spread box beams",
+    "steel multi girder straight", "three sided frame", "through truss", "truss",
+]
+
+ABUTMENT_TYPES = [
+    "abutmentless", "cantilever stems", "culvert", "footing only", "integral",
+    "semi-integral", "short stem", "solid cantilever", "stem", "stub cantilever",
+]
+
+# Función para generar un identificador con el formato de los ids del backend (24 caracteres hexadecimales)
+def make_id(number):
+    return f"{number:024x}"
+
+# Función para generar la lista de entradas de una estimación
+def random_input_list(rng):
+    return {
+        "structureType": rng.choice(STRUCTURE_TYPES),
+        "abutmentType": rng.choice(ABUTMENT_TYPES),
+        "total_Width": round(rng.uniform(4.0, 40.0), 2),
+        "number_of_Spans": rng.randint(1, 8),
+        "total_Length": round(rng.uniform(6.0, 400.0), 2),
+        "year": rng.randint(1990, 2024),
+    }
+
+# Función para calcular un costo sintético a partir de las entradas
+def synthetic_cost(input_list):
+    area = float(input_list["total_Width"]) * float(input_list["total_Length"])
+    return round(area * 2500.0 + int(input_list["number_of_Spans"]) * 150000.0 + (int(input_list["year"]) - 1990) * 1000.0, 2)
+
+# Función para generar usuarios, estimaciones y solicitudes sintéticas
+def generate_dataset(n_users=20, n_estimations=1000, n_requests=200, seed=42):
+    rng = random.Random(seed)
+
+    users = [{
+        "id": make_id(1),
+        "name": "Administrador",
+        "email": "admin@example.com",
+        "phone": "999999999",
+        "state": "Activo",
+        "password": "admin",
+        "role": "admin",
+    }]
+    for i in range(2, n_users + 1):
+        users.append({
+            "id": make_id(i),
+            "name": f"Usuario {i}",
+            "email": f"usuario{i}@example.com",
+            "phone": f"9{rng.randint(10000000, 99999999)}",
+            "state": rng.choice(["Activo", "Inactivo"]),
+            "password": "usuario",
+            "role": "usuario",
+        })
+
+    estimations = []
+    for i in range(1, n_estimations + 1):
+        input_list = random_input_list(rng)
+        estimations.append({
+            "id": make_id(1_000_000 + i),
+            "input_list": input_list,
+            "total_Cost": synthetic_cost(input_list),
+        })
+
+    requests = []
+    start = date(2024, 1, 1)
+    for i in range(1, n_requests + 1):
+        estimation = rng.choice(estimations) if estimations else None
+        request_type = rng.choice(["Edición", "Eliminación"])
+        new_input = random_input_list(rng)
+        requests.append({
+            "id": make_id(2_000_000 + i),
+            "prediction_id": estimation["id"] if estimation else "",
+            "request_type": request_type,
+            "user_id": rng.choice(users)["id"],
+            "date": (start + timedelta(days=rng.randint(0, 365))).strftime("%Y-%m-%d"),
+            "original_prediction_object": {
+                "input_list": estimation["input_list"] if estimation else random_input_list(rng),
+                "total_Cost": estimation["total_Cost"] if estimation else 0,
+            },
+            "new_prediction_object": {
+                "input_list": new_input,
+                "total_Cost": synthetic_cost(new_input),
+            },
+            "status": rng.choice(["Pendiente", "Pendiente", "Aprobado", "Rechazado"]),
+        })
+
+    return users, estimations, requests
@@ -0,0 +1,17 @@
+import sys
+
+from streamlit.web import cli as stcli
+
+from utils.keepwarm import start_keep_warm
+from utils.warmup import start_prewarm
+
+# Arranque del servidor con precarga en segundo plano.
+# Ejecuta `streamlit run Main.py` en este mismo proceso, de modo que las cachés que llena la
+# precarga son las mismas que usan las sesiones. Acepta las mismas opciones que `streamlit run`:
+#   python serve.py --server.port 8501
+
+if __name__ == "__main__":
+    start_prewarm()
+    start_keep_warm()
+    sys.argv = ["streamlit", "run", "Main.py", *sys.argv[1:]]
+    sys.exit(stcli.main())
@@ -0,0 +1,155 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.config import ANALYTICS_COST_BINS
+from utils.tracing import span
+
+# Agregados de costos para el panel de análisis.
+# Se guardan como sumas y conteos por grupo (tipo de superestructura y estribo, año) y como un
+# histograma con intervalos fijos, de modo que los agregados de las filas nuevas se pueden sumar
+# a los anteriores sin recalcular todo. Las gráficas reciben solo estas tablas pequeñas (grupos,
+# años, intervalos del histograma), nunca las filas individuales.
+
+GROUP_COLUMNS = ["structureType", "abutmentType"]
+
+# Columnas de las que dependen los agregados (el id no influye, y es la columna más costosa de hashear)
+HASH_COLUMNS = ["total_Cost", "total_Width", "total_Length", "number_of_Spans", "year"] + GROUP_COLUMNS
+
+# Función para calcular las métricas por fila (costo por m² y por tramo; NaN si el divisor no es positivo).
+# Las filas sin costo (estimaciones provisionales aún sin confirmar) no se cuentan en ningún promedio.
+def _row_metrics(df):
+    cost = df["total_Cost"].astype(np.float64)
+    area = df["total_Width"].astype(np.float64) * df["total_Length"].astype(np.float64)
+    spans = df["number_of_Spans"].astype(np.float64)
+    return pd.DataFrame({
+        "structureType": df["structureType"],
+        "abutmentType": df["abutmentType"],
+        "year": df["year"],
+        "cost": cost,
+        "cost_per_m2": cost.where(area > 0) / area.where(area > 0),
+        "cost_per_span": cost.where(spans > 0) / spans.where(spans > 0),
+    })
+
+# Función para calcular los límites fijos de los intervalos del histograma de costos
+def cost_bin_edges(df, bins=ANALYTICS_COST_BINS):
+    costs = df["total_Cost"].to_numpy(dtype=np.float64)
+    costs = costs[np.isfinite(costs)]
+    if costs.size == 0:
+        return np.linspace(0.0, 1.0, bins + 1)
+    low, high = float(costs.min()), float(costs.max())
+    if low == high:
+        high = low + 1.0
+    return np.linspace(low, high, bins + 1)
+
+class CostAggregates:
+    def __init__(self, by_group, by_year, histogram, bin_edges):
+        self.by_group = by_group
+        self.by_year = by_year
+        self.histogram = histogram
+        self.bin_edges = bin_edges
+
+    # Función para calcular los agregados de un conjunto de estimaciones (operaciones vectorizadas)
+    @classmethod
+    def from_frame(cls, df, bin_edges):
+        metrics = _row_metrics(df)
+        by_group = metrics.groupby(GROUP_COLUMNS, observed=True).agg(
+            cost_sum=("cost", "sum"),
+            rows=("cost", "count"),
+            m2_sum=("cost_per_m2", "sum"),
+            m2_count=("cost_per_m2", "count"),
+            span_sum=("cost_per_span", "sum"),
+            span_count=("cost_per_span", "count"),
+        )
+        by_year = metrics.groupby("year").agg(cost_sum=("cost", "sum"), rows=("cost", "count"))
+        histogram, _ = np.histogram(metrics["cost"].dropna().to_numpy(), bins=bin_edges)
+        return cls(by_group, by_year, histogram, bin_edges)
+
+    # Función para sumar los agregados de otras filas (con los mismos intervalos del histograma)
+    def merge(self, other):
+        return CostAggregates(
+            self.by_group.add(other.by_group, fill_value=0),
+            self.by_year.add(other.by_year, fill_value=0),
+            self.histogram + other.histogram,
+            self.bin_edges
+        )
+
+    # Función para verificar si los costos de unas filas caen dentro de los intervalos del histograma
+    def covers(self, df):
+        costs = df["total_Cost"].to_numpy(dtype=np.float64)
+        costs = costs[np.isfinite(costs)]
+        return costs.size == 0 or (costs.min() >= self.bin_edges[0] and costs.max() <= self.bin_edges[-1])
+
+    # Función para obtener el resumen general (número de estimaciones, costo promedio y costo promedio por m²)
+    def summary(self):
+        totals = self.by_group.sum()
+        rows = int(totals["rows"]) if len(self.by_group) else 0
+        return {
+            "rows": rows,
+            "mean_cost": totals["cost_sum"] / rows if rows else float("nan"),
+            "mean_cost_per_m2": totals["m2_sum"] / totals["m2_count"] if rows and totals["m2_count"] else float("nan"),
+        }
+
+    # Función para obtener el costo promedio por m² y por tramo según una dimensión (tipo de superestructura o de estribo)
+    def by_dimension(self, dimension):
+        grouped = self.by_group.groupby(level=dimension, observed=True).sum()
+        grouped = grouped[grouped["rows"] > 0]
+        return pd.DataFrame({
+            "cost_per_m2": grouped["m2_sum"] / grouped["m2_count"],
+            "cost_per_span": grouped["span_sum"] / grouped["span_count"],
+            "rows": grouped["rows"].astype(int),
+        }).reset_index()
+
+    # Función para obtener la tendencia del costo promedio por año
+    def year_trend(self):
+        by_year = self.by_year[self.by_year["rows"] > 0]
+        return pd.DataFrame({
+            "year": by_year.index.astype(int),
+            "mean_cost": (by_year["cost_sum"] / by_year["rows"]).to_numpy(),
+            "rows": by_year["rows"].astype(int).to_numpy(),
+        })
+
+    # Función para obtener la distribución de costos (un registro por intervalo del histograma)
+    def cost_distribution(self):
+        return pd.DataFrame({
+            "cost_from": self.bin_edges[:-1],
+            "cost_to": self.bin_edges[1:],
+            "rows": self.histogram.astype(int),
+        })
+
+# Agregados de la última versión de las estimaciones, compartidos por todas las sesiones del proceso.
+# Se guarda un hash por fila para saber si la nueva versión solo agrega filas al final.
+_state = {"version": None, "row_hashes": None, "aggregates": None}
+_lock = threading.Lock()
+
+# Función para calcular un hash por fila con las columnas que usan los agregados
+def _row_hashes(df):
+    return pd.util.hash_pandas_object(df[HASH_COLUMNS], index=False).to_numpy()
+
+# Función para obtener los agregados de una versión de las estimaciones.
+# Si la versión nueva solo agrega filas al final de la anterior (por ejemplo, estimaciones recién
+# creadas), se calculan solo los agregados de esas filas y se suman; si no, se recalcula todo.
+def get_cost_aggregates(df, version):
+    with _lock:
+        if _state["version"] == version and _state["aggregates"] is not None:
+            return _state["aggregates"]
+
+        row_hashes = _row_hashes(df)
+        previous_hashes, previous = _state["row_hashes"], _state["aggregates"]
+        appended = (
+            previous is not None
+            and len(row_hashes) >= len(previous_hashes)
+            and np.array_equal(row_hashes[:len(previous_hashes)], previous_hashes)
+        )
+        new_rows = df.iloc[len(previous_hashes):] if appended else None
+
+        if appended and previous.covers(new_rows):
+            with span("transform.cost_aggregates", mode="incremental", rows=len(new_rows)):
+                aggregates = previous.merge(CostAggregates.from_frame(new_rows, previous.bin_edges))
+        else:
+            with span("transform.cost_aggregates", mode="full", rows=len(df)):
+                aggregates = CostAggregates.from_frame(df, cost_bin_edges(df))
+
+        _state.update(version=version, row_hashes=row_hashes, aggregates=aggregates)
+        return aggregates
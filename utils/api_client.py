@@ -0,0 +1,182 @@
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from tenacity import Retrying, retry_if_exception_type, retry_if_result, stop_after_attempt, wait_exponential
+
+from utils.config import (
+    BACKEND_IDEMPOTENCY_KEYS,
+    BACKEND_URL,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_POOL_SIZE,
+    HTTP_READ_TIMEOUT,
+    HTTP_RETRIES,
+    HTTP_RETRY_BACKOFF,
+    HTTP_RETRY_MAX_WAIT,
+)
+from utils.tracing import log_event, span
+
+# Cliente HTTP compartido por todas las vistas.
+# El módulo se importa una sola vez por proceso, por lo que la sesión (y su pool de
+# conexiones keep-alive) se reutiliza entre reruns y entre sesiones de Streamlit.
+#
+# Las lecturas (GET) se reintentan con espera exponencial ante errores de conexión, tiempos de espera
+# agotados o respuestas 502/503/504 (por ejemplo, mientras el backend despierta). Un circuit breaker
+# compartido por el proceso cuenta las fallas seguidas: al llegar al límite, las llamadas fallan de
+# inmediato con BackendUnavailable durante CIRCUIT_RESET_TIMEOUT segundos, y después se deja pasar
+# una llamada de prueba que lo cierra si el backend responde.
+
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+# Métodos que se pueden reintentar sin riesgo de duplicar una escritura
+RETRY_METHODS = {"GET", "HEAD"}
+
+# Métodos cuya repetición deja el mismo resultado que una sola llamada
+IDEMPOTENT_METHODS = RETRY_METHODS | {"PUT", "DELETE"}
+
+# Respuestas que indican que el backend no está disponible (no un error de la aplicación)
+UNAVAILABLE_STATUS = {502, 503, 504}
+
+# Respuestas que indican que el backend no procesó la llamada
+NOT_PROCESSED_STATUS = {408, 429, 503}
+
+# Error de las llamadas rechazadas mientras el circuit breaker está abierto
+# (es un ConnectionError, por lo que lo atrapan los mismos manejadores de requests.RequestException)
+class BackendUnavailable(requests.ConnectionError):
+    pass
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    # Función para verificar si se permite una llamada (con el circuito abierto, solo una llamada de prueba tras la espera)
+    def before_call(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            if remaining > 0 or self.trial_in_flight:
+                raise BackendUnavailable(f"El servidor no está disponible. Se volverá a intentar en {max(remaining, 0):.0f} s.")
+            self.trial_in_flight = True
+
+    # Función para registrar una llamada exitosa (cierra el circuito)
+    def record_success(self):
+        with self.lock:
+            was_open = self.opened_at is not None
+            self.failures, self.opened_at, self.trial_in_flight = 0, None, False
+        if was_open:
+            log_event("circuit.closed")
+
+    # Función para registrar una falla (abre el circuito al llegar al límite o si falla la llamada de prueba)
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            opening = self.trial_in_flight or (self.opened_at is None and self.failures >= self.failure_threshold)
+            if opening:
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+        if opening:
+            log_event("circuit.opened", failures=self.failures)
+
+circuit_breaker = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+
+# Función para saber si un error prueba que la llamada no llegó al backend: circuito abierto, tiempo de
+# conexión agotado o conexión rechazada. Un tiempo de lectura agotado o una conexión cortada durante la
+# respuesta no lo prueban (el backend pudo haber procesado la llamada).
+def never_sent(error):
+    if isinstance(error, (BackendUnavailable, requests.ConnectTimeout)):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+# Función para saber si una llamada fallida (`error`, o la respuesta con `status`) se puede reenviar sin riesgo
+# de duplicar una escritura. Una creación (POST) solo se reenvía si no llegó al backend, salvo que el backend
+# respete el encabezado Idempotency-Key (BACKEND_IDEMPOTENCY_KEYS).
+def can_resend(method, error=None, status=None):
+    if method in IDEMPOTENT_METHODS or BACKEND_IDEMPOTENCY_KEYS:
+        return True
+    if error is not None:
+        return never_sent(error)
+    return status in NOT_PROCESSED_STATUS
+
+_session = None
+_session_lock = threading.Lock()
+
+# Función para crear la sesión HTTP con su pool de conexiones
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    # La sesión es compartida entre usuarios: no se deben guardar cookies del backend
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+# Función para obtener la sesión HTTP compartida (se crea la primera vez)
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+# Función para construir la URL completa de un endpoint del backend
+def api_url(path):
+    return f"{BACKEND_URL}/{str(path).lstrip('/')}"
+
+# Función para enviar una llamada, con reintentos y espera exponencial si el método lo permite
+def _send(method, url, tags, **kwargs):
+    if method not in RETRY_METHODS or HTTP_RETRIES <= 0:
+        return get_session().request(method, url, **kwargs)
+
+    retrying = Retrying(
+        stop=stop_after_attempt(HTTP_RETRIES + 1),
+        wait=wait_exponential(multiplier=HTTP_RETRY_BACKOFF, max=HTTP_RETRY_MAX_WAIT),
+        retry=retry_if_exception_type((requests.ConnectionError, requests.Timeout))
+              | retry_if_result(lambda response: response.status_code in UNAVAILABLE_STATUS),
+        # Tras el último intento se devuelve su respuesta (o se propaga su error)
+        retry_error_callback=lambda state: state.outcome.result(),
+        before=lambda state: tags.update(attempts=state.attempt_number),
+    )
+    return retrying(get_session().request, method, url, **kwargs)
+
+# Función para realizar una llamada al backend con tiempo de espera
+def api_request(method, path, timeout=None, **kwargs):
+    with span("http", method=method, path=str(path)) as tags:
+        circuit_breaker.before_call()
+        try:
+            response = _send(method, api_url(path), tags, timeout=timeout or DEFAULT_TIMEOUT, **kwargs)
+        except BaseException:
+            # Cualquier error cuenta como falla (también libera la llamada de prueba; si no, el circuito quedaría abierto)
+            circuit_breaker.record_failure()
+            raise
+        if response.status_code in UNAVAILABLE_STATUS:
+            circuit_breaker.record_failure()
+        else:
+            circuit_breaker.record_success()
+        tags.update(status=response.status_code, bytes=len(response.content))
+        return response
+
+def api_get(path, **kwargs):
+    return api_request("GET", path, **kwargs)
+
+def api_post(path, **kwargs):
+    return api_request("POST", path, **kwargs)
+
+def api_put(path, **kwargs):
+    return api_request("PUT", path, **kwargs)
+
+def api_delete(path, **kwargs):
+    return api_request("DELETE", path, **kwargs)
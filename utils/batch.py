@@ -0,0 +1,131 @@
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_exponential
+
+from utils.api_client import api_post, can_resend
+from utils.config import BATCH_MAX_RETRIES, BATCH_MAX_WORKERS
+from utils.data import API_URL_PREDICT
+from utils.vocabularies import estribo_optiones, superestructura_optiones
+
+# Estimación masiva: lectura y validación de un archivo de puentes y envío concurrente
+# de cada fila a /estimation/predict con un número acotado de hilos.
+
+TEXT_COLUMNS = ["structureType", "abutmentType"]
+NUMERIC_COLUMNS = ["total_Width", "total_Length", "number_of_Spans", "year"]
+REQUIRED_COLUMNS = TEXT_COLUMNS + NUMERIC_COLUMNS
+
+# Error usado para reintentar las respuestas 5xx/429 del backend
+class RetryableResponseError(requests.RequestException):
+    pass
+
+# Función para leer un archivo CSV o Excel (.xlsx, con openpyxl) subido por el usuario.
+# El formato .xls no se admite: necesitaría xlrd, que no es una dependencia del proyecto.
+# Un archivo dañado o que no es del formato de su extensión se informa con ValueError, como los errores de validación.
+def read_batch_file(uploaded_file):
+    name = uploaded_file.name.lower()
+    if name.endswith(".xlsx"):
+        try:
+            return pd.read_excel(uploaded_file)
+        except (zipfile.BadZipFile, KeyError, OSError) as e:
+            raise ValueError("no se pudo leer el archivo Excel (¿está dañado o no es un .xlsx?)") from e
+    try:
+        return pd.read_csv(uploaded_file)
+    except OSError as e:
+        raise ValueError("no se pudo leer el archivo CSV") from e
+
+# Función para llevar un texto al valor canónico del vocabulario (sin distinguir mayúsculas)
+def _canonical(series, options):
+    canonical = {option.lower(): option for option in options}
+    return series.astype("string").str.strip().str.lower().map(canonical)
+
+# Función para validar todas las filas del archivo de una sola vez.
+# Devuelve las filas válidas y las filas con errores (con la columna "error" y "status").
+def validate_batch(df):
+    df.columns = [str(column).strip() for column in df.columns]
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"faltan las columnas {', '.join(missing)}")
+
+    batch = df[REQUIRED_COLUMNS].copy()
+    batch["structureType"] = _canonical(batch["structureType"], superestructura_optiones)
+    batch["abutmentType"] = _canonical(batch["abutmentType"], estribo_optiones)
+    for column in NUMERIC_COLUMNS:
+        batch[column] = pd.to_numeric(batch[column], errors="coerce")
+
+    checks = {
+        "tipo de superestructura no válido": batch["structureType"].isna(),
+        "tipo de estribo no válido": batch["abutmentType"].isna(),
+        "ancho total menor a 2": ~(batch["total_Width"] >= 2),
+        "longitud total menor a 2": ~(batch["total_Length"] >= 2),
+        "número de tramos no válido": ~((batch["number_of_Spans"] >= 1) & (batch["number_of_Spans"] % 1 == 0)),
+        "año fuera de 1900-2100": ~(batch["year"].between(1900, 2100) & (batch["year"] % 1 == 0)),
+    }
+
+    errors = pd.Series("", index=batch.index, dtype="object")
+    for message, mask in checks.items():
+        errors = errors.mask(mask, errors + message + "; ")
+    errors = errors.str.rstrip("; ")
+
+    is_valid = errors == ""
+    valid = batch[is_valid].astype({"number_of_Spans": "int64", "year": "int64"})
+
+    invalid = df.loc[~is_valid, REQUIRED_COLUMNS].copy()
+    invalid["status"] = "Inválido"
+    invalid["error"] = errors[~is_valid]
+    return valid, invalid
+
+# Función para saber si se reintenta el envío de una fila: cada envío crea una estimación, por lo que solo
+# se reintenta si el envío anterior no llegó al backend (ver `can_resend` en utils/api_client.py)
+def _should_retry(error):
+    return isinstance(error, RetryableResponseError) or (isinstance(error, requests.RequestException) and can_resend("POST", error))
+
+# Función para enviar una fila a /estimation/predict, reintentando los errores de conexión y las respuestas
+# que indican que el backend no la procesó (todos los intentos llevan la misma clave de idempotencia)
+def _predict_row(row, max_retries):
+    headers = {"Idempotency-Key": uuid.uuid4().hex}
+    retrying = Retrying(
+        stop=stop_after_attempt(max_retries),
+        wait=wait_exponential(multiplier=0.5, max=8),
+        retry=retry_if_exception(_should_retry),
+        reraise=True,
+    )
+    for attempt in retrying:
+        with attempt:
+            response = api_post(API_URL_PREDICT, json=row, headers=headers)
+            if (response.status_code == 429 or response.status_code >= 500) and can_resend("POST", status=response.status_code):
+                raise RetryableResponseError(f"respuesta {response.status_code}")
+
+    if response.status_code != 200:
+        return {**row, "status": "Error", "error": f"respuesta {response.status_code}"}
+
+    result = response.json()
+    if isinstance(result, dict):
+        return {**row, "id": result.get("id"), "total_Cost": result.get("total_Cost"), "status": "OK", "error": ""}
+    return {**row, "total_Cost": result, "status": "OK", "error": ""}
+
+# Función para enviar todas las filas válidas con un pool acotado de hilos.
+# `on_progress(completadas, total)` se llama desde el hilo que invoca la función.
+def submit_batch(valid_df, on_progress=None, max_workers=BATCH_MAX_WORKERS, max_retries=BATCH_MAX_RETRIES):
+    rows = valid_df.to_dict("records")
+    results = [None] * len(rows)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_predict_row, row, max_retries): position for position, row in enumerate(rows)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            position = futures[future]
+            try:
+                results[position] = future.result()
+            except requests.RequestException as e:
+                results[position] = {**rows[position], "status": "Error", "error": str(e)}
+            if on_progress:
+                on_progress(done, len(rows))
+
+    return pd.DataFrame(results, columns=REQUIRED_COLUMNS + ["id", "total_Cost", "status", "error"])
+
+# Función para generar el archivo de resultados descargable
+def results_to_csv(results):
+    return results.to_csv(index=False).encode("utf-8")
@@ -0,0 +1,92 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Hilos para las tareas en segundo plano (por ejemplo, terminar una descarga que ya no se espera)
+_background = ThreadPoolExecutor(max_workers=4, thread_name_prefix="background")
+
+# Función para ejecutar una función en segundo plano con el contexto de la ejecución actual.
+# Devuelve un Future; la tarea sigue aunque quien la inició deje de esperarla.
+def run_in_background(function):
+    ctx = get_script_run_ctx()
+
+    def run():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return function()
+
+    return _background.submit(contextvars.copy_context().run, run)
+
+# Llamadas en curso compartidas por todas las sesiones del proceso (clave -> llamada)
+_flights = {}
+_flights_lock = threading.Lock()
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+# Función para ejecutar una sola vez las llamadas idénticas simultáneas (single-flight).
+# La primera llamada con una clave ejecuta la función; las que llegan mientras está en curso esperan
+# y reciben el mismo resultado (o el mismo error). La clave se libera al terminar, por lo que las
+# llamadas posteriores vuelven a ejecutar la función.
+# Devuelve (resultado, compartido), donde compartido indica si se reutilizó una llamada en curso.
+def single_flight(key, function):
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result, True
+
+    try:
+        flight.result = function()
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+    return flight.result, False
+
+# Función para ejecutar varias funciones en paralelo y devolver sus resultados en el mismo orden.
+# Los hilos reciben el contexto de la ejecución actual de Streamlit para poder usar las cachés,
+# y una copia de las variables de contexto (por ejemplo, la traza de latencia de la página).
+def run_parallel(*functions):
+    ctx = get_script_run_ctx()
+
+    def run(function):
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return function()
+
+    with ThreadPoolExecutor(max_workers=len(functions)) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, run, function) for function in functions]
+        return [future.result() for future in futures]
+
+# Función para aplicar una función a cada elemento con un número acotado de hilos.
+# Devuelve una lista de (elemento, resultado, error) en el orden original; los errores no se propagan.
+def run_bounded(function, items, max_workers):
+    items = list(items)
+    results = [None] * len(items)
+    if not items:
+        return results
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = {executor.submit(contextvars.copy_context().run, function, item): position for position, item in enumerate(items)}
+        for future in as_completed(futures):
+            position = futures[future]
+            try:
+                results[position] = (items[position], future.result(), None)
+            except Exception as e:
+                results[position] = (items[position], None, e)
+    return results
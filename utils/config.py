@@ -0,0 +1,98 @@
+from decouple import Csv, config
+
+# Configuración centralizada de la aplicación.
+# Cada valor se puede sobrescribir con una variable de entorno o un archivo .env
+
+# URL base del backend
+BACKEND_URL = config("BACKEND_URL", default="https://tesis-backend-nxpy.onrender.com").rstrip("/")
+
+# Tiempos de espera (en segundos) para conectar y para leer la respuesta del backend
+HTTP_CONNECT_TIMEOUT = config("HTTP_CONNECT_TIMEOUT", default=5.0, cast=float)
+HTTP_READ_TIMEOUT = config("HTTP_READ_TIMEOUT", default=30.0, cast=float)
+
+# Reintentos de las lecturas (GET) ante errores de conexión o respuestas 502/503/504, con espera exponencial (en segundos)
+HTTP_RETRIES = config("HTTP_RETRIES", default=2, cast=int)
+HTTP_RETRY_BACKOFF = config("HTTP_RETRY_BACKOFF", default=0.5, cast=float)
+HTTP_RETRY_MAX_WAIT = config("HTTP_RETRY_MAX_WAIT", default=8.0, cast=float)
+
+# El backend descarta las escrituras repetidas con el mismo encabezado Idempotency-Key. Solo entonces se
+# reenvía una creación (POST) que pudo haber llegado al backend (por ejemplo, tras un tiempo de lectura agotado)
+BACKEND_IDEMPOTENCY_KEYS = config("BACKEND_IDEMPOTENCY_KEYS", default=False, cast=bool)
+
+# Circuit breaker: tras este número de fallas seguidas, las llamadas fallan de inmediato durante CIRCUIT_RESET_TIMEOUT segundos
+CIRCUIT_FAILURE_THRESHOLD = config("CIRCUIT_FAILURE_THRESHOLD", default=3, cast=int)
+CIRCUIT_RESET_TIMEOUT = config("CIRCUIT_RESET_TIMEOUT", default=30.0, cast=float)
+
+# Ping periódico (en segundos) para que el backend no se suspenda por inactividad (0 lo desactiva)
+KEEP_WARM_INTERVAL = config("KEEP_WARM_INTERVAL", default=600, cast=int)
+KEEP_WARM_PATH = config("KEEP_WARM_PATH", default="/")
+
+# Segundos que se espera al backend antes de mostrar el último listado obtenido (marcado como desactualizado)
+STALE_SERVE_AFTER = config("STALE_SERVE_AFTER", default=3.0, cast=float)
+
+# Número máximo de conexiones keep-alive que se mantienen abiertas con el backend
+HTTP_POOL_SIZE = config("HTTP_POOL_SIZE", default=20, cast=int)
+
+# Tiempo de vida (en segundos) y número máximo de entradas de la caché de listados
+CACHE_TTL = config("CACHE_TTL", default=60, cast=int)
+CACHE_MAX_ENTRIES = config("CACHE_MAX_ENTRIES", default=64, cast=int)
+
+# Compartir una sola llamada al backend entre las lecturas idénticas simultáneas de todas las sesiones
+REQUEST_COALESCING = config("REQUEST_COALESCING", default=True, cast=bool)
+
+# Paginación, filtrado y búsqueda de estimaciones en el servidor (en lugar de descargar todo el listado)
+ESTIMATIONS_SERVER_PAGING = config("ESTIMATIONS_SERVER_PAGING", default=False, cast=bool)
+
+# Estimación masiva: hilos concurrentes hacia /estimation/predict e intentos por fila
+BATCH_MAX_WORKERS = config("BATCH_MAX_WORKERS", default=8, cast=int)
+BATCH_MAX_RETRIES = config("BATCH_MAX_RETRIES", default=3, cast=int)
+
+# Artefacto del modelo local usado para la vista previa de costos (ruta relativa a la raíz del proyecto)
+MODEL_PATH = config("MODEL_PATH", default="models/stub_model.json")
+
+# Número máximo de predicciones memorizadas (por entradas normalizadas) compartidas entre sesiones
+PREDICTION_CACHE_SIZE = config("PREDICTION_CACHE_SIZE", default=10000, cast=int)
+
+# Sincronización incremental de estimaciones en una instantánea local (Parquet) en lugar de descargar todo el listado
+ESTIMATIONS_DELTA_SYNC = config("ESTIMATIONS_DELTA_SYNC", default=False, cast=bool)
+SNAPSHOT_DIR = config("SNAPSHOT_DIR", default="data/cache")
+SNAPSHOT_SYNC_INTERVAL = config("SNAPSHOT_SYNC_INTERVAL", default=CACHE_TTL, cast=int)
+
+# Base de datos local (SQLite) con la copia de los listados y la cola de escrituras pendientes (ruta relativa a la raíz del proyecto)
+LOCAL_DB_PATH = config("LOCAL_DB_PATH", default="data/cache/local.db")
+LOCAL_MIRROR = config("LOCAL_MIRROR", default=True, cast=bool)
+
+# Segundos que espera la copia local antes de escribir una versión nueva (para no competir con la página que la descargó)
+LOCAL_MIRROR_DELAY = config("LOCAL_MIRROR_DELAY", default=2.0, cast=float)
+
+# Envío en segundo plano de la cola de escrituras: registros por lote, segundos entre revisiones y espera máxima entre reintentos
+OUTBOX_BATCH_SIZE = config("OUTBOX_BATCH_SIZE", default=20, cast=int)
+OUTBOX_FLUSH_INTERVAL = config("OUTBOX_FLUSH_INTERVAL", default=5.0, cast=float)
+OUTBOX_RETRY_MAX_WAIT = config("OUTBOX_RETRY_MAX_WAIT", default=300.0, cast=float)
+
+# Modo de tabla por defecto de los listados ("rows": una fila de widgets por registro, "grid": una sola cuadrícula)
+TABLE_MODE = config("TABLE_MODE", default="rows")
+GRID_PAGE_SIZE = config("GRID_PAGE_SIZE", default=100, cast=int)
+
+# Trazas de latencia por página (spans en un archivo JSONL rotativo y panel de tiempos para administradores)
+TRACE_ENABLED = config("TRACE_ENABLED", default=True, cast=bool)
+TRACE_FILE = config("TRACE_FILE", default="logs/trace.jsonl")
+TRACE_MAX_BYTES = config("TRACE_MAX_BYTES", default=5 * 1024 * 1024, cast=int)
+TRACE_BACKUP_COUNT = config("TRACE_BACKUP_COUNT", default=3, cast=int)
+TRACE_PANEL = config("TRACE_PANEL", default=True, cast=bool)
+
+# Módulos que la precarga del servidor (serve.py) importa en segundo plano antes de la primera visita
+PREWARM_MODULES = config(
+    "PREWARM_MODULES",
+    default="pandas,numpy,pyarrow,requests,streamlit_cookies_controller,utils.api_client,utils.cookies,utils.data,utils.flash,utils.frames,utils.search,utils.predictor,utils.snapshot,utils.batch,utils.grid,utils.pagination,utils.vocabularies,utils.analytics,utils.keepwarm,utils.localdb,utils.outbox,utils.optimistic,utils.profiling",
+    cast=Csv()
+)
+
+# Perfilado de CPU de las páginas para administradores (capturas pstats, cuántas se conservan y funciones mostradas en el visor)
+PROFILING_ENABLED = config("PROFILING_ENABLED", default=True, cast=bool)
+PROFILE_DIR = config("PROFILE_DIR", default="profiles")
+PROFILE_MAX_FILES = config("PROFILE_MAX_FILES", default=50, cast=int)
+PROFILE_TOP_FUNCTIONS = config("PROFILE_TOP_FUNCTIONS", default=30, cast=int)
+
+# Número de intervalos del histograma de costos del panel de análisis
+ANALYTICS_COST_BINS = config("ANALYTICS_COST_BINS", default=40, cast=int)
@@ -0,0 +1,29 @@
+import streamlit as st
+
+# Cambios de cookies diferidos.
+# El componente de cookies solo escribe en el navegador cuando se renderiza; si se llama a
+# st.rerun() justo después, el cambio se pierde (por eso antes se esperaba con time.sleep).
+# Aquí el cambio se aplica de inmediato a la copia en memoria del controlador, se encola,
+# y el componente se renderiza en la siguiente ejecución sin bloquear el hilo.
+
+PENDING_COOKIES_KEY = "_pending_cookie_ops"
+
+# Función para establecer una cookie de forma diferida
+def set_cookie(controller, name, value):
+    controller.getAll()[name] = value
+    st.session_state.setdefault(PENDING_COOKIES_KEY, []).append(("set", name, value))
+
+# Función para eliminar una cookie de forma diferida
+def remove_cookie(controller, name):
+    controller.getAll().pop(name, None)
+    st.session_state.setdefault(PENDING_COOKIES_KEY, []).append(("remove", name, None))
+
+# Función para escribir en el navegador los cambios de cookies encolados
+def apply_pending_cookies(controller):
+    for operation, name, value in st.session_state.pop(PENDING_COOKIES_KEY, []):
+        if operation == "set":
+            controller.set(name, value)
+        else:
+            # El controlador exige que la cookie exista en su copia en memoria para eliminarla
+            controller.getAll().setdefault(name, None)
+            controller.remove(name)
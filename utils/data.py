@@ -0,0 +1,284 @@
+import hashlib
+import sqlite3
+import time
+from collections import defaultdict
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import requests
+import streamlit as st
+
+from utils.api_client import api_get
+from utils.concurrency import run_in_background, single_flight
+from utils.config import CACHE_MAX_ENTRIES, CACHE_TTL, LOCAL_MIRROR, REQUEST_COALESCING, STALE_SERVE_AFTER
+from utils.localdb import load_mirror, mirror_in_background, mirror_version
+from utils.tracing import span
+
+# Capa de caché para los listados del backend.
+# Los GET de listados se guardan durante CACHE_TTL segundos para que cada interacción
+# con los widgets (búsqueda, paginador) no vuelva a descargar todo el conjunto de datos.
+# Después de cada escritura se debe llamar a `invalidate` con los endpoints afectados.
+# Cada listado se guarda junto con su versión (hash del contenido descargado), que sirve
+# como clave para los recursos derivados (por ejemplo, los índices de búsqueda).
+# Los listados completos se guardan con `st.cache_resource`: todas las sesiones comparten la misma
+# copia (sin volver a copiarla en cada ejecución), por lo que los registros son de solo lectura;
+# quien necesite modificarlos debe trabajar sobre una copia.
+#
+# Debajo de la caché, las lecturas idénticas que están en curso al mismo tiempo (de cualquier sesión
+# del proceso) comparten una sola llamada al backend y su respuesta ya procesada. Cada endpoint tiene
+# una generación que aumenta con `invalidate`: una lectura iniciada después de una escritura no se une
+# a una llamada anterior, y si una escritura ocurre mientras la llamada está en curso, se vuelve a
+# leer para no guardar en la caché datos anteriores a la escritura.
+#
+# Si el backend no responde (está despertando o el circuit breaker está abierto), los listados
+# completos se sirven desde la última descarga exitosa y se marcan como desactualizados
+# (`show_stale_notice`). Con una descarga anterior disponible, se espera al backend como máximo
+# STALE_SERVE_AFTER segundos; la descarga sigue en segundo plano y llena la caché al terminar.
+# Cada versión nueva de un listado se copia en la base de datos local (utils/localdb.py), de modo
+# que también hay una descarga anterior disponible al reiniciar la aplicación con el backend caído.
+
+API_URL_ESTIMATIONS = "/estimation"
+API_URL_REQUESTS = "/request"
+API_URL_USERS = "/user"
+
+# Endpoint que calcula el costo de una estimación y la guarda (cada llamada crea una estimación)
+API_URL_PREDICT = "/estimation/predict"
+
+# Generación de cada endpoint (aumenta cada vez que se invalida)
+_generations = defaultdict(int)
+
+# Función para obtener el endpoint base de una ruta ("/user/<id>" -> "/user")
+def endpoint_of(path):
+    return "/" + str(path).strip("/").split("/")[0]
+
+# Función para realizar un GET compartiendo la llamada con las lecturas idénticas en curso
+def _coalesced_get(path, params, parse):
+    fetch = lambda: parse(api_get(path, params=params))
+    if not REQUEST_COALESCING:
+        return fetch()
+
+    endpoint = endpoint_of(path)
+    with span("data.fetch", path=str(path)) as tags:
+        while True:
+            generation = _generations[endpoint]
+            key = ("GET", str(path), tuple(sorted((params or {}).items())), generation)
+            result, shared = single_flight(key, fetch)
+            if _generations[endpoint] == generation:
+                tags.update(coalesced=shared)
+                return result
+
+# Función para procesar la respuesta de un listado
+def _parse_json(response):
+    response.raise_for_status()
+    return response.json()
+
+# Función para procesar la respuesta de un listado completo junto con su versión y la hora de descarga
+def _parse_dataset(response):
+    response.raise_for_status()
+    return {"version": hashlib.sha1(response.content).hexdigest(), "records": response.json(), "fetched_at": time.time()}
+
+# Función para descargar un listado del backend
+def _fetch_json(path, params=None):
+    return _coalesced_get(path, params, _parse_json)
+
+# Función para descargar un listado completo junto con su versión
+def _fetch_dataset(path):
+    return _coalesced_get(path, None, _parse_dataset)
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def fetch_estimations():
+    return _fetch_dataset(API_URL_ESTIMATIONS)
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def fetch_requests():
+    return _fetch_dataset(API_URL_REQUESTS)
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def fetch_users():
+    return _fetch_dataset(API_URL_USERS)
+
+# Usuario individual (GET /user/{id}), para no descargar toda la tabla de usuarios
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def fetch_user(user_id):
+    return _fetch_json(f"{API_URL_USERS}/{user_id}")
+
+# Índice id -> rol construido a partir del listado de usuarios en caché
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def fetch_role_index():
+    return {user["id"]: user.get("role") for user in fetch_users()["records"]}
+
+# Página de estimaciones filtrada y paginada en el servidor.
+# Respuesta esperada: {"items": [...], "total": <registros que cumplen la búsqueda>}
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def fetch_estimations_page(page, page_size, search):
+    return _fetch_json(API_URL_ESTIMATIONS, params={"page": page, "page_size": page_size, "search": search})
+
+_CACHED_LISTS = {
+    API_URL_ESTIMATIONS: fetch_estimations,
+    API_URL_REQUESTS: fetch_requests,
+    API_URL_USERS: fetch_users,
+}
+
+# Funciones en caché que dependen de cada endpoint (se invalidan junto con su listado)
+_CACHED_DEPENDENTS = {
+    API_URL_ESTIMATIONS: [fetch_estimations_page],
+    API_URL_USERS: [fetch_user, fetch_role_index],
+}
+
+# Funciones adicionales que se llaman al invalidar un endpoint (por ejemplo, marcar una instantánea local como desactualizada)
+_INVALIDATION_CALLBACKS = {}
+
+# Función para registrar una función que se llama cada vez que se invalida un endpoint
+def on_invalidate(path, callback):
+    _INVALIDATION_CALLBACKS.setdefault(path, []).append(callback)
+
+# Última descarga exitosa de cada listado completo
+_last_good = {}
+
+# Versión de cada listado que ya se copió en la base de datos local
+_mirrored = {}
+
+# Listados que se están mostrando desactualizados (endpoint -> hora de la descarga mostrada)
+_stale_since = {}
+
+# Función para obtener la última descarga exitosa de un listado (en memoria o en la copia local)
+def _last_good_dataset(path):
+    dataset = _last_good.get(path)
+    if dataset is None and LOCAL_MIRROR:
+        try:
+            dataset = load_mirror(path)
+        except sqlite3.Error:
+            return None
+        if dataset is not None:
+            _last_good.setdefault(path, dataset)
+    return dataset
+
+# Función para saber si hay una descarga anterior de un listado disponible
+def _has_last_good(path):
+    if path in _last_good:
+        return True
+    try:
+        return LOCAL_MIRROR and mirror_version(path) is not None
+    except sqlite3.Error:
+        return False
+
+# Función para copiar una versión nueva de un listado en la base de datos local (en el hilo de la copia)
+def _mirror_dataset(path, dataset):
+    if LOCAL_MIRROR and _mirrored.get(path) != dataset["version"]:
+        _mirrored[path] = dataset["version"]
+        mirror_in_background(path, dataset["records"], dataset["version"], dataset["fetched_at"])
+
+# Función para marcar un listado como desactualizado
+def mark_data_stale(path, fetched_at):
+    _stale_since[path] = fetched_at
+
+# Función para marcar un listado como actualizado
+def mark_data_fresh(path):
+    _stale_since.pop(path, None)
+
+# Descargas en segundo plano en curso (clave -> (futuro, inicio)), para no lanzar otra mientras la anterior
+# sigue esperando al backend
+_in_flight = {}
+
+# Función para obtener un dato del backend; si ya hay un valor anterior, se espera al backend
+# solo `wait` segundos (la descarga sigue en segundo plano). Las ejecuciones que llegan mientras esa
+# descarga sigue en curso la comparten y esperan solo lo que le queda de esos `wait` segundos: si ya
+# los superó, se sirve el valor anterior sin volver a esperarla.
+def fetch_or_timeout(key, fetch, has_previous, wait=STALE_SERVE_AFTER):
+    if not has_previous:
+        return fetch()
+    future, started = _in_flight.get(key, (None, None))
+    if future is None or future.done():
+        future, started = _in_flight[key] = run_in_background(fetch), time.monotonic()
+    return future.result(timeout=max(0.0, started + wait - time.monotonic()))
+
+# Función para obtener un listado y su versión desde la caché.
+# Si el backend falla, devuelve la última descarga exitosa (marcada como desactualizada), o (None, None) si no hay ninguna.
+def load_dataset(path):
+    try:
+        dataset = fetch_or_timeout(path, _CACHED_LISTS[path], _has_last_good(path))
+    except (requests.RequestException, FutureTimeoutError):
+        dataset = _last_good_dataset(path)
+        if dataset is None:
+            return None, None
+        mark_data_stale(path, dataset["fetched_at"])
+        return dataset["records"], dataset["version"]
+
+    _last_good[path] = dataset
+    _mirror_dataset(path, dataset)
+    mark_data_fresh(path)
+    return dataset["records"], dataset["version"]
+
+# Función para mostrar un aviso si alguno de los listados se está mostrando desactualizado
+def show_stale_notice(*paths):
+    fetched = [_stale_since[path] for path in paths if path in _stale_since]
+    if fetched:
+        fetched_at = time.strftime("%H:%M:%S", time.localtime(min(fetched)))
+        st.warning(f"El servidor no responde. Se muestran los datos obtenidos a las {fetched_at}; se actualizarán cuando vuelva a estar disponible.", icon="⚠️")
+
+# Endpoints que respondieron con la lista completa a una petición paginada (el backend no pagina)
+_unpaged = set()
+
+# Función para saber si el backend pagina un listado
+def server_paging_supported(path):
+    return path not in _unpaged
+
+# Función para obtener una página de estimaciones desde la caché (None si el backend falla).
+# Si el backend no pagina, devuelve la lista completa y se recuerda para paginar localmente desde entonces.
+def load_estimations_page(page, page_size, search=""):
+    try:
+        result = fetch_estimations_page(int(page), int(page_size), search or "")
+    except requests.RequestException:
+        return None
+    if isinstance(result, list):
+        _unpaged.add(API_URL_ESTIMATIONS)
+        fetch_estimations_page.clear()
+    return result
+
+# Último rol conocido de cada usuario
+_last_good_roles = {}
+
+# Función para consultar el rol de un usuario en el backend y recordarlo
+def _refresh_role(user_id):
+    try:
+        role = fetch_user(user_id).get("role")
+    except requests.HTTPError as e:
+        # Si el backend no expone GET /user/{id}, usar el índice de roles en caché
+        if e.response is None or e.response.status_code not in (404, 405):
+            raise
+        role = fetch_role_index().get(user_id)
+    if role is not None:
+        _last_good_roles[user_id] = role
+    return role
+
+# Función para obtener el rol de un usuario (`fallback`, por ejemplo el de la cookie, si no existe o el backend falla).
+# El rol se consulta en cada ejecución, pero sin bloquear la página: con un rol ya conocido se usa ese
+# de inmediato y la consulta sigue en segundo plano; con solo el `fallback`, se espera como máximo STALE_SERVE_AFTER.
+def load_user_role(user_id, fallback=None):
+    if not user_id:
+        return None
+    known = _last_good_roles.get(user_id)
+    try:
+        role = fetch_or_timeout(
+            ("role", user_id),
+            lambda: _refresh_role(user_id),
+            known is not None or fallback is not None,
+            wait=0 if known is not None else STALE_SERVE_AFTER
+        )
+    except (requests.RequestException, FutureTimeoutError):
+        role = known
+    return role if role is not None else fallback
+
+# Función para invalidar solo las páginas de estimaciones pedidas al servidor (el listado completo se conserva)
+def invalidate_estimation_pages():
+    _generations[API_URL_ESTIMATIONS] += 1
+    fetch_estimations_page.clear()
+
+# Función para invalidar la caché de los listados modificados por una escritura
+def invalidate(*paths):
+    for path in paths or _CACHED_LISTS:
+        _generations[path] += 1
+        _CACHED_LISTS[path].clear()
+        for dependent in _CACHED_DEPENDENTS.get(path, []):
+            dependent.clear()
+        for callback in _INVALIDATION_CALLBACKS.get(path, []):
+            callback()
@@ -0,0 +1,15 @@
+import streamlit as st
+
+# Mensajes "flash": se encolan en session_state antes de un st.rerun() y se muestran en
+# el siguiente render, en lugar de bloquear el hilo con time.sleep para que se alcancen a ver.
+
+FLASH_KEY = "_flash_messages"
+
+# Función para encolar un mensaje ("success", "info", "warning" o "error")
+def flash(message, level="success"):
+    st.session_state.setdefault(FLASH_KEY, []).append((level, message))
+
+# Función para mostrar (y descartar) los mensajes encolados
+def show_flashes():
+    for level, message in st.session_state.pop(FLASH_KEY, []):
+        getattr(st, level)(message)
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.config import ESTIMATIONS_DELTA_SYNC
+from utils.data import API_URL_ESTIMATIONS, load_dataset
+from utils.optimistic import changes_for
+from utils.tracing import span
+from utils.vocabularies import estribo_optiones, superestructura_optiones
+
+# Transformaciones de los listados del backend a DataFrames
+
+ESTIMATION_INPUT_COLUMNS = ["structureType", "abutmentType", "total_Width", "number_of_Spans", "total_Length", "year"]
+
+# Columnas de texto con vocabulario fijo: se guardan como categorías (códigos enteros)
+ESTIMATION_CATEGORIES = {
+    "structureType": superestructura_optiones,
+    "abutmentType": estribo_optiones,
+}
+
+# Función para aplanar las columnas de input_list de las estimaciones
+def flatten_estimations(estimaciones):
+    with span("transform.flatten_estimations", rows=len(estimaciones)):
+        df_estimations = pd.DataFrame(estimaciones)  # Convertir a DataFrame
+        if df_estimations.empty:
+            return df_estimations
+        return df_estimations.join(pd.json_normalize(df_estimations['input_list'])).drop(columns=['input_list'])
+
+# Función para reducir el tipo de una columna numérica sin perder información
+def _downcast(values):
+    if pd.api.types.is_integer_dtype(values):
+        return pd.to_numeric(values, downcast="integer")
+    if pd.api.types.is_float_dtype(values):
+        # Solo se pasa a float32 si todos los valores se conservan exactamente
+        compact = values.astype(np.float32)
+        if np.array_equal(compact.to_numpy(dtype=np.float64), values.to_numpy(), equal_nan=True):
+            return compact
+    return values
+
+# Función para convertir las estimaciones aplanadas a una representación compacta:
+# categorías para los tipos de superestructura y estribo (el vocabulario fijo más cualquier
+# valor desconocido que venga del backend), números con el tipo más pequeño que los representa
+# y el id como texto de Arrow en lugar de objetos de Python.
+def compact_estimations(df_estimations):
+    if df_estimations.empty:
+        return df_estimations
+
+    columns = {}
+    for column, vocabulary in ESTIMATION_CATEGORIES.items():
+        if column in df_estimations:
+            values = df_estimations[column].astype("object")
+            unknown = [value for value in pd.unique(values.dropna()) if value not in set(vocabulary)]
+            columns[column] = pd.Categorical(values, categories=list(vocabulary) + sorted(unknown))
+    for column in df_estimations.columns:
+        if column not in columns and pd.api.types.is_numeric_dtype(df_estimations[column]):
+            columns[column] = _downcast(df_estimations[column])
+    if "id" in df_estimations:
+        columns["id"] = df_estimations["id"].astype("string[pyarrow]")
+    return df_estimations.assign(**columns)
+
+# Función para volver a los tipos generales antes de combinar estimaciones (por ejemplo, al aplicar un delta)
+def expand_estimations(df_estimations):
+    dtypes = {}
+    for column in df_estimations.columns:
+        values = df_estimations[column]
+        if isinstance(values.dtype, pd.CategoricalDtype) or column == "id":
+            dtypes[column] = "object"
+        elif pd.api.types.is_integer_dtype(values):
+            dtypes[column] = "int64"
+        elif pd.api.types.is_float_dtype(values):
+            dtypes[column] = "float64"
+    return df_estimations.astype(dtypes)
+
+# Función para aplicar cambios a la tabla compacta: los registros modificados se reemplazan en su
+# posición, los nuevos se agregan al final y los eliminados se quitan
+def merge_estimations(df, items, deleted):
+    changes = flatten_estimations(items)
+    if df is None or df.empty:
+        merged = changes
+    else:
+        merged = expand_estimations(df)
+        if not changes.empty:
+            changes = changes.reindex(columns=merged.columns.union(changes.columns, sort=False))
+            merged = merged.reindex(columns=changes.columns)
+            existing = merged["id"].isin(changes["id"])
+            if existing.any():
+                updates = changes.set_index("id")
+                merged = merged.set_index("id")
+                merged.update(updates)
+                merged = merged.reset_index()
+            merged = pd.concat([merged, changes[~changes["id"].isin(df["id"])]], ignore_index=True)
+    if deleted and not merged.empty:
+        merged = merged[~merged["id"].isin(deleted)]
+    return compact_estimations(merged.reset_index(drop=True))
+
+# Tabla compacta de estimaciones de una versión del listado.
+# Se construye una sola vez por versión y se comparte entre todas las sesiones del proceso,
+# por lo que las vistas solo deben leerla (filtrar o paginar crea copias, nunca la modifican).
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_estimations_frame(version, _estimaciones):
+    with span("transform.compact_estimations", rows=len(_estimaciones)):
+        return compact_estimations(flatten_estimations(_estimaciones))
+
+# Tabla de estimaciones con los cambios optimistas aplicados (utils/optimistic.py).
+# Se construye una sola vez por versión con cambios, a partir de la tabla ya compacta.
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_changed_estimations_frame(version, _df_estimations, _changes):
+    items, deleted = {}, set()
+    for change in _changes:
+        if change["record"] is None:
+            deleted.add(change["id"])
+            items.pop(change["id"], None)
+        else:
+            items[change["id"]] = {**items.get(change["id"], {}), **change["record"]}
+    with span("transform.apply_changes", changes=len(_changes)):
+        return merge_estimations(_df_estimations, list(items.values()), deleted)
+
+# Función para obtener la tabla compacta de todas las estimaciones y su versión ((None, None) si el backend falla).
+# Con ESTIMATIONS_DELTA_SYNC se usa la instantánea local sincronizada de forma incremental.
+# Los cambios optimistas pendientes se aplican sobre la tabla.
+def load_estimations_frame():
+    if ESTIMATIONS_DELTA_SYNC:
+        # Importación local: snapshot depende de este módulo
+        from utils.snapshot import load_estimations_snapshot
+        df_estimations, version = load_estimations_snapshot()
+    else:
+        estimaciones, version = load_dataset(API_URL_ESTIMATIONS)
+        df_estimations = get_estimations_frame(version, estimaciones) if estimaciones is not None else None
+
+    if df_estimations is None:
+        return None, None
+    changes, changed_version = changes_for(API_URL_ESTIMATIONS, version)
+    if not changes:
+        return df_estimations, version
+    return get_changed_estimations_frame(changed_version, df_estimations, changes), changed_version
@@ -0,0 +1,37 @@
+import streamlit as st
+
+from utils.config import GRID_PAGE_SIZE, TABLE_MODE
+
+# Modo de tabla en cuadrícula: cada página se muestra con un solo widget st.dataframe y la
+# selección de filas controla las acciones (editar, eliminar, ver, aprobar), en lugar de
+# crear columnas, textos y botones por cada fila.
+
+GRID_PAGE_SIZE_OPTIONS = [50, 100, 250, 500]
+
+# Función para mostrar el selector de modo de tabla de una vista (True si se usa la cuadrícula)
+def use_grid(key):
+    state_key = f"{key}_grid_mode"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = TABLE_MODE == "grid"
+    return st.toggle("Vista de cuadrícula", key=state_key)
+
+# Función para obtener la clave y el tamaño de página por defecto del paginador según el modo de tabla
+def paginator_settings(key, grid_mode, default_page_size):
+    if grid_mode:
+        return f"{key}_grid", GRID_PAGE_SIZE
+    return key, default_page_size
+
+# Función para mostrar una página de datos en una cuadrícula y devolver las filas seleccionadas
+def render_grid(df, columns, key, selection_mode="single-row"):
+    view = df[list(columns)].rename(columns=columns)
+    event = st.dataframe(
+        view,
+        key=key,
+        on_select="rerun",
+        selection_mode=selection_mode,
+        hide_index=True,
+        use_container_width=True
+    )
+    # Ignorar filas seleccionadas que ya no existen (por ejemplo, tras una búsqueda o un cambio de página)
+    rows = [row for row in event.selection.rows if row < len(df)]
+    return df.iloc[rows]
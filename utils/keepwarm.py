@@ -0,0 +1,43 @@
+import threading
+
+import requests
+
+from utils.api_client import api_get
+from utils.config import KEEP_WARM_INTERVAL, KEEP_WARM_PATH
+from utils.tracing import log_event
+
+# Ping periódico al backend para que no se suspenda por inactividad.
+# El hilo es uno solo por proceso y se inicia desde Main.py (o desde serve.py al arrancar el servidor).
+# Cualquier respuesta indica que el backend está despierto; los pings pasan por el circuit breaker,
+# por lo que una respuesta exitosa también lo cierra.
+
+_keep_warm_thread = None
+_keep_warm_lock = threading.Lock()
+_stop = threading.Event()
+
+# Función para hacer un ping al backend
+def ping_backend():
+    try:
+        response = api_get(KEEP_WARM_PATH)
+        log_event("keepwarm.ping", status=response.status_code)
+        return True
+    except requests.RequestException as e:
+        log_event("keepwarm.ping", error=type(e).__name__)
+        return False
+
+# Función que hace los pings cada KEEP_WARM_INTERVAL segundos hasta que se detenga el hilo
+def _keep_warm_loop():
+    while not _stop.is_set():
+        ping_backend()
+        _stop.wait(KEEP_WARM_INTERVAL)
+
+# Función para iniciar el hilo de pings (solo una vez por proceso; no hace nada si el intervalo es 0)
+def start_keep_warm():
+    global _keep_warm_thread
+    if KEEP_WARM_INTERVAL <= 0 or _keep_warm_thread is not None:
+        return _keep_warm_thread
+    with _keep_warm_lock:
+        if _keep_warm_thread is None:
+            _keep_warm_thread = threading.Thread(target=_keep_warm_loop, name="keepwarm", daemon=True)
+            _keep_warm_thread.start()
+    return _keep_warm_thread
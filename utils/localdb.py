@@ -0,0 +1,236 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from utils.config import LOCAL_DB_PATH, LOCAL_MIRROR_DELAY
+from utils.tracing import log_event, span
+
+# Base de datos local (SQLite) del proceso.
+# Guarda una copia de los listados del backend (estimaciones, solicitudes y usuarios), que se usa
+# cuando el backend no responde (incluso después de reiniciar la aplicación), y la cola de
+# escrituras pendientes (outbox, ver utils/outbox.py).
+# Cada hilo usa su propia conexión; el modo WAL permite leer mientras otro hilo escribe.
+#
+# La copia se escribe en un hilo propio de baja prioridad (`mirror_in_background`): espera
+# LOCAL_MIRROR_DELAY segundos para no competir con la ejecución que descargó el listado, se queda
+# solo con la versión más reciente de cada listado y escribe únicamente las filas que cambiaron
+# respecto de la versión anterior guardada en este proceso.
+
+# Tabla de la copia local de cada endpoint
+MIRROR_TABLES = {
+    "/estimation": "estimations",
+    "/request": "requests",
+    "/user": "users",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mirror_versions (
+    path TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    method TEXT NOT NULL,
+    path TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, next_attempt_at);
+"""
+
+# Campos que no se guardan en la copia local (datos sensibles)
+MIRROR_EXCLUDED_FIELDS = {
+    "/user": ("password",),
+}
+
+# Filas por lote al preparar la copia local (entre lotes se cede el GIL a los demás hilos)
+MIRROR_CHUNK_SIZE = 1000
+
+# Tablas de la copia local: el registro completo se guarda como JSON, en el orden del listado.
+# (Los índices por user_id y status de versiones anteriores no se usan y se eliminan.)
+_MIRROR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    position INTEGER NOT NULL,
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+DROP INDEX IF EXISTS {table}_user_id;
+DROP INDEX IF EXISTS {table}_status;
+"""
+
+_local = threading.local()
+
+# Función para obtener la ruta de la base de datos
+def _db_path():
+    path = Path(LOCAL_DB_PATH)
+    if not path.is_absolute():
+        path = Path(__file__).resolve().parent.parent / path
+    return path
+
+# Función para obtener la conexión del hilo actual (se crea, junto con las tablas, la primera vez)
+def get_connection():
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        path = _db_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(_SCHEMA + "".join(_MIRROR_SCHEMA.format(table=table) for table in MIRROR_TABLES.values()))
+        _remove_excluded_fields(connection)
+        _local.connection = connection
+    return connection
+
+# Función para obtener la versión guardada de un listado (None si no hay copia)
+def mirror_version(path):
+    row = get_connection().execute("SELECT version FROM mirror_versions WHERE path = ?", (path,)).fetchone()
+    return row["version"] if row else None
+
+# Función para quitar de la copia local los campos excluidos (por ejemplo, los guardados por una versión anterior)
+def _remove_excluded_fields(connection):
+    with connection:
+        for path, fields in MIRROR_EXCLUDED_FIELDS.items():
+            for field in fields:
+                connection.execute(
+                    f"UPDATE {MIRROR_TABLES[path]} SET data = json_remove(data, ?) WHERE json_type(data, ?) IS NOT NULL",
+                    (f"$.{field}", f"$.{field}")
+                )
+
+# Función para obtener el registro que se guarda en la copia local (sin los campos excluidos)
+def _mirror_record(path, record):
+    excluded = MIRROR_EXCLUDED_FIELDS.get(path)
+    if not excluded:
+        return record
+    return {key: value for key, value in record.items() if key not in excluded}
+
+# Filas guardadas en la copia local de cada listado durante este proceso (id -> (posición, registro))
+_saved_rows = {}
+
+# Función para calcular la posición de cada registro de una versión nueva sin renumerar toda la tabla:
+# los registros que conservan el orden mantienen su posición guardada y los nuevos o desplazados
+# toman posiciones intermedias entre sus vecinos. Si ya no caben, se renumera todo.
+def _positions(records, saved):
+    positions = [None] * len(records)
+    last = float("-inf")
+    for index, record in enumerate(records):
+        previous = saved.get(str(record.get("id")))
+        if previous is not None and previous[0] > last:
+            positions[index] = last = previous[0]
+
+    index = 0
+    while index < len(records):
+        if positions[index] is not None:
+            index += 1
+            continue
+        end = index
+        while end < len(records) and positions[end] is None:
+            end += 1
+        count = end - index
+        low = positions[index - 1] if index > 0 else None
+        high = positions[end] if end < len(records) else None
+        if low is None and high is None:
+            low, high = -1, count
+        elif low is None:
+            low = high - count - 1
+        elif high is None:
+            high = low + count + 1
+        step = (high - low) / (count + 1)
+        for offset in range(count):
+            positions[index + offset] = low + step * (offset + 1)
+        index = end
+
+    if any(a >= b for a, b in zip(positions, positions[1:])):
+        return list(range(len(records)))
+    return positions
+
+# Función para guardar una versión de un listado en la copia local (en una sola transacción).
+# Solo se escriben las filas nuevas o modificadas, se mueven las que cambiaron de posición y se borran
+# las que ya no están; la primera vez en el proceso se reemplaza la tabla completa (salvo que ya sea de
+# esta versión). Devuelve cuántas filas se escribieron, movieron y borraron.
+def save_mirror(path, records, version, fetched_at):
+    table = MIRROR_TABLES[path]
+    connection = get_connection()
+    saved = _saved_rows.get(path)
+    replace = saved is None
+    if replace and mirror_version(path) == version:
+        _saved_rows[path] = {str(record.get("id")): (position, record) for position, record in enumerate(records)}
+        return {"written": 0, "moved": 0, "deleted": 0}
+
+    positions = list(range(len(records))) if replace else _positions(records, saved)
+    current, written, moved = {}, [], []
+    for position, record in zip(positions, records):
+        record_id = str(record.get("id"))
+        current[record_id] = (position, record)
+        previous = None if replace else saved.get(record_id)
+        if previous is None or previous[1] != record:
+            written.append((position, record_id, json.dumps(_mirror_record(path, record))))
+        elif previous[0] != position:
+            moved.append((position, record_id))
+        if position % MIRROR_CHUNK_SIZE == 0:
+            time.sleep(0)
+    deleted = [] if replace else [(record_id,) for record_id in saved.keys() - current.keys()]
+
+    with connection:
+        if replace:
+            connection.execute(f"DELETE FROM {table}")
+        connection.executemany(f"DELETE FROM {table} WHERE id = ?", deleted)
+        connection.executemany(f"INSERT OR REPLACE INTO {table} (position, id, data) VALUES (?, ?, ?)", written)
+        connection.executemany(f"UPDATE {table} SET position = ? WHERE id = ?", moved)
+        connection.execute(
+            "INSERT OR REPLACE INTO mirror_versions (path, version, fetched_at) VALUES (?, ?, ?)",
+            (path, version, fetched_at)
+        )
+    _saved_rows[path] = current
+    return {"written": len(written), "moved": len(moved), "deleted": len(deleted)}
+
+# Versiones pendientes de copiar (listado -> (registros, versión, hora de descarga)); solo se guarda la más reciente
+_pending = {}
+_pending_lock = threading.Lock()
+_mirror_wake = threading.Event()
+_mirror_thread = None
+
+# Función que copia las versiones pendientes, después de esperar LOCAL_MIRROR_DELAY segundos
+def _mirror_loop():
+    while True:
+        _mirror_wake.wait()
+        time.sleep(LOCAL_MIRROR_DELAY)
+        with _pending_lock:
+            _mirror_wake.clear()
+            pending = dict(_pending)
+            _pending.clear()
+
+        for path, (records, version, fetched_at) in pending.items():
+            try:
+                with span("data.mirror", path=path, rows=len(records)) as tags:
+                    tags.update(save_mirror(path, records, version, fetched_at))
+            except sqlite3.Error as e:
+                log_event("mirror.error", path=path, error=repr(e))
+
+# Función para copiar una versión de un listado en la copia local desde el hilo de la copia (se inicia la primera vez)
+def mirror_in_background(path, records, version, fetched_at):
+    global _mirror_thread
+    with _pending_lock:
+        _pending[path] = (records, version, fetched_at)
+        if _mirror_thread is None:
+            _mirror_thread = threading.Thread(target=_mirror_loop, name="mirror", daemon=True)
+            _mirror_thread.start()
+    _mirror_wake.set()
+
+# Función para leer la copia local de un listado, con el mismo formato que la caché de listados (None si no hay copia)
+def load_mirror(path):
+    connection = get_connection()
+    meta = connection.execute("SELECT version, fetched_at FROM mirror_versions WHERE path = ?", (path,)).fetchone()
+    if meta is None:
+        return None
+
+    rows = connection.execute(f"SELECT data FROM {MIRROR_TABLES[path]} ORDER BY position").fetchall()
+    return {"version": meta["version"], "records": [json.loads(row["data"]) for row in rows], "fetched_at": meta["fetched_at"]}
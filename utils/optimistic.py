@@ -0,0 +1,201 @@
+import threading
+from collections import defaultdict
+
+from utils.config import ESTIMATIONS_SERVER_PAGING
+from utils.data import API_URL_ESTIMATIONS, API_URL_REQUESTS, API_URL_USERS, endpoint_of, invalidate_estimation_pages
+from utils.outbox import enqueue, new_key, on_failed, on_sent, track
+from utils.tracing import log_event
+
+# Cambios optimistas sobre los listados locales.
+# Una escritura se encola (utils/outbox.py) y sus efectos se aplican de inmediato sobre los listados
+# en caché, sin volver a descargarlos:
+#   - registro nuevo: se agrega con un id temporal ("local-...") hasta que el backend devuelve el real
+#   - registro modificado: los campos del cambio reemplazan a los del registro
+#   - registro eliminado: se quita del listado
+# Cuando el backend confirma la escritura, el cambio se concilia con su respuesta y se mantiene hasta
+# que el listado se vuelve a descargar (ya con el cambio incluido). Si el backend la rechaza, el cambio
+# se descarta (rollback) y el listado vuelve a mostrar los datos del backend.
+# Una escritura enviada sin cambios locales (por ejemplo, encolada antes de reiniciar la aplicación)
+# se aplica igual sobre los listados a partir de la respuesta del backend, en lugar de volver a
+# descargarlos completos.
+# Los cambios son del proceso, por lo que todas las sesiones los ven.
+
+_changes = []
+_lock = threading.Lock()
+
+# Revisión de los cambios de cada listado (forma parte de la versión de los datos mostrados)
+_revisions = defaultdict(int)
+
+# Última versión del backend vista para cada listado
+_base_versions = {}
+
+# Función para obtener el id temporal de un registro creado por una escritura
+def local_id(key):
+    return f"local-{key[:16]}"
+
+# Función para saber si un registro es una creación que el backend aún no confirmó (todavía tiene el id temporal).
+# Las acciones sobre esos registros se deshabilitan: se enviarían con un id que el backend no conoce.
+def is_provisional(record_id):
+    return str(record_id).startswith("local-")
+
+# Función para registrar los cambios de una escritura.
+# `changes` es una lista de (listado, id, registro): registro None elimina; id None crea un registro nuevo.
+def _add_changes(key, changes, confirmed=False):
+    with _lock:
+        for path, record_id, record in changes:
+            created = record_id is None
+            record_id = local_id(key) if created else record_id
+            _changes.append({
+                "key": key,
+                "path": path,
+                "id": record_id,
+                "record": None if record is None else {**record, "id": record_id},
+                "created": created,
+                "confirmed": confirmed,
+                "confirmed_version": _base_versions.get(path) if confirmed else None,
+            })
+            _revisions[path] += 1
+
+# Función para obtener los cambios de la estimación asociada a una solicitud aprobada (lo mismo que hace el backend al aprobarla)
+def approval_changes(request):
+    if not request.get("prediction_id"):
+        return []
+    if request.get("request_type") == "Eliminación":
+        return [(API_URL_ESTIMATIONS, request["prediction_id"], None)]
+    if request.get("request_type") == "Edición" and isinstance(request.get("new_prediction_object"), dict):
+        return [(API_URL_ESTIMATIONS, request["prediction_id"], dict(request["new_prediction_object"]))]
+    return []
+
+# Función para obtener los cambios de una escritura ya enviada a partir de su ruta y de la respuesta del backend
+# (las modificaciones y creaciones responden con el registro completo)
+def _sent_changes(item, result):
+    path = endpoint_of(item["path"])
+    parts = item["path"].strip("/").split("/")
+    record_id = parts[1] if len(parts) == 2 and parts[1] not in ("create", "predict") else None
+    if item["method"] == "DELETE" and record_id:
+        return [(path, record_id, None)]
+    if not isinstance(result, dict) or not result.get("id"):
+        return []
+    if item["method"] == "PUT" and record_id:
+        changes = [(path, record_id, result)]
+        if path == API_URL_REQUESTS and isinstance(item["body"], dict) and item["body"].get("status") == "Aprobado":
+            changes += approval_changes(result)
+        return changes
+    if item["method"] == "POST" and record_id is None:
+        return [(path, result["id"], result)]
+    return []
+
+# Función para encolar una escritura y aplicar sus cambios de inmediato (ver `_add_changes`).
+# La sesión recuerda la escritura para informarle su resultado (`label` y `info`, ver utils/outbox.py).
+# Devuelve la clave de idempotencia de la escritura.
+def submit(write_path, body, changes, method="POST", label=None, **info):
+    key = new_key()
+    _add_changes(key, changes)
+
+    try:
+        enqueue(write_path, body, method=method, key=key)
+    except Exception:
+        _discard(key)
+        raise
+    track(key, label or write_path, **info)
+    return key
+
+# Función para descartar los cambios de una escritura
+def _discard(key):
+    with _lock:
+        for change in [change for change in _changes if change["key"] == key]:
+            _changes.remove(change)
+            _revisions[change["path"]] += 1
+
+# Función para conciliar los cambios de una escritura confirmada con la respuesta del backend
+def _confirm(item, response):
+    try:
+        result = response.json()
+    except ValueError:
+        result = None
+
+    with _lock:
+        changes = [change for change in _changes if change["key"] == item["idempotency_key"]]
+        for change in changes:
+            # El registro creado toma el id (y los campos calculados) que devolvió el backend
+            if change["created"] and isinstance(result, dict) and result.get("id") and change["path"] == endpoint_of(item["path"]):
+                change["record"] = {**change["record"], **result}
+                change["id"] = result["id"]
+            change["confirmed"] = True
+            change["confirmed_version"] = _base_versions.get(change["path"])
+            _revisions[change["path"]] += 1
+
+    # Escritura sin cambios locales: aplicar su efecto sobre los listados como un cambio ya confirmado
+    if not changes:
+        sent = _sent_changes(item, result)
+        _add_changes(item["idempotency_key"], sent, confirmed=True)
+        changes = [{"path": path} for path, _, _ in sent]
+
+    # Con la paginación en el servidor, las páginas de estimaciones no muestran los cambios locales: se vuelven a pedir
+    if ESTIMATIONS_SERVER_PAGING and any(change["path"] == API_URL_ESTIMATIONS for change in changes):
+        invalidate_estimation_pages()
+    return bool(changes)
+
+# Función para revertir los cambios de una escritura rechazada por el backend
+def _rollback(item, response):
+    with _lock:
+        found = any(change["key"] == item["idempotency_key"] for change in _changes)
+    if found:
+        _discard(item["idempotency_key"])
+        log_event("optimistic.rollback", path=item["path"], status=getattr(response, "status_code", None))
+    return found
+
+# Función para obtener los cambios vigentes de un listado y la versión de los datos con esos cambios.
+# Los cambios confirmados se descartan cuando el listado del backend ya es una versión posterior a la confirmación.
+def changes_for(path, version):
+    with _lock:
+        _base_versions[path] = version
+        refreshed = [
+            change for change in _changes
+            if change["path"] == path and change["confirmed"] and change["confirmed_version"] != version
+        ]
+        for change in refreshed:
+            _changes.remove(change)
+        if refreshed:
+            _revisions[path] += 1
+
+        changes = [dict(change) for change in _changes if change["path"] == path]
+        if not changes:
+            return [], version
+        return changes, f"{version}+{_revisions[path]}"
+
+# Último listado con los cambios aplicados de cada endpoint (listado -> (registros originales, versión, resultado)).
+# El resultado se comparte entre sesiones, por lo que solo se debe leer.
+_applied = {}
+
+# Función para aplicar los cambios a un listado (lista de registros). Devuelve (registros, versión).
+# Mientras no cambien ni el listado ni los cambios, se reutiliza el resultado anterior.
+def with_changes(path, records, version):
+    if records is None:
+        return records, version
+    changes, version = changes_for(path, version)
+    if not changes:
+        return records, version
+    applied = _applied.get(path)
+    if applied is not None and applied[0] is records and applied[1] == version:
+        return applied[2], version
+
+    result = list(records)
+    positions = {record.get("id"): position for position, record in enumerate(result)}
+    deleted = set()
+    for change in changes:
+        if change["record"] is None:
+            deleted.add(change["id"])
+        elif change["id"] in positions:
+            position = positions[change["id"]]
+            result[position] = {**result[position], **change["record"]}
+        else:
+            positions[change["id"]] = len(result)
+            result.append(change["record"])
+    result = [record for record in result if record.get("id") not in deleted]
+    _applied[path] = (records, version, result)
+    return result, version
+
+for _path in (API_URL_ESTIMATIONS, API_URL_REQUESTS, API_URL_USERS):
+    on_sent(_path, _confirm)
+    on_failed(_path, _rollback)
@@ -0,0 +1,282 @@
+import json
+import threading
+import time
+import uuid
+
+import requests
+import streamlit as st
+
+from utils.api_client import UNAVAILABLE_STATUS, api_request, can_resend
+from utils.concurrency import run_bounded
+from utils.config import BATCH_MAX_WORKERS, OUTBOX_BATCH_SIZE, OUTBOX_FLUSH_INTERVAL, OUTBOX_RETRY_MAX_WAIT
+from utils.data import API_URL_ESTIMATIONS, API_URL_REQUESTS, API_URL_USERS, endpoint_of, invalidate
+from utils.localdb import get_connection
+from utils.tracing import log_event, span
+
+# Cola durable de escrituras (outbox) en la base de datos local.
+# Las vistas encolan la escritura y continúan sin esperar al backend; un hilo de fondo (uno por
+# proceso) envía la cola por lotes, en el orden en que se encolaron (las modificaciones consecutivas de
+# registros distintos del mismo listado, como una aprobación en bloque, se envían a la vez con un número
+# acotado de hilos). Cada escritura lleva una clave de idempotencia (encabezado Idempotency-Key),
+# pero solo se confía en ella si el backend la respeta (BACKEND_IDEMPOTENCY_KEYS).
+#   - respuesta 2xx: se elimina de la cola y su efecto se aplica sobre los listados locales (ver
+#     utils/optimistic.py); solo si no se puede aplicar se invalida la caché del endpoint
+#   - error de conexión, 429 o 502/503/504: se reintenta con espera exponencial. Una creación (POST) solo
+#     se reintenta si es seguro que no llegó al backend (ver `can_resend` en utils/api_client.py); si no,
+#     queda fallida y se vuelve a descargar su listado (el backend pudo haberla guardado)
+#   - otro error: queda marcada como fallida (no se reintenta)
+# Las escrituras que no se enviaron se conservan al reiniciar la aplicación, salvo sus datos sensibles
+# (SECRET_FIELDS): en la base de datos quedan reemplazados por SECRET_MARKER y su valor se guarda solo en
+# memoria hasta que la escritura se procesa. Si la aplicación se reinicia antes, la escritura queda fallida.
+# Cada sesión recuerda las escrituras que encoló y solo a ella se le informa su resultado.
+
+# Respuestas que se reintentan además de las de backend no disponible
+RETRY_STATUS = UNAVAILABLE_STATUS | {408, 429}
+
+_worker_thread = None
+_worker_lock = threading.Lock()
+_wake = threading.Event()
+
+# Escrituras encoladas por la sesión cuyo resultado aún no se le informó (clave de idempotencia -> datos)
+SESSION_WRITES_KEY = "_outbox_writes"
+
+# Campos que no se guardan en la cola (como la contraseña de un usuario) y su valor en memoria por escritura
+# (clave de idempotencia -> {campo: valor})
+SECRET_FIELDS = ("password",)
+SECRET_MARKER = {"$secret": True}
+_secrets = {}
+
+# Funciones llamadas al enviar o al fallar una escritura de una ruta o de cualquier ruta de un endpoint:
+# callback(item, response). Si alguna devuelve True, la escritura ya quedó reflejada en los listados
+# locales y no se invalida la caché del endpoint.
+_SENT_CALLBACKS = {}
+_FAILED_CALLBACKS = {}
+
+# Función para registrar una función que se llama cada vez que se envía una escritura de un endpoint
+def on_sent(path, callback):
+    _SENT_CALLBACKS.setdefault(path, []).append(callback)
+
+# Función para registrar una función que se llama cada vez que una escritura de un endpoint falla definitivamente
+def on_failed(path, callback):
+    _FAILED_CALLBACKS.setdefault(path, []).append(callback)
+
+# Función para generar una clave de idempotencia
+def new_key():
+    return uuid.uuid4().hex
+
+# Función para encolar una escritura. Devuelve su clave de idempotencia.
+def enqueue(path, body, method="POST", key=None):
+    key = key or new_key()
+    stored = body
+    if isinstance(body, dict):
+        secrets = {field: body[field] for field in SECRET_FIELDS if field in body}
+        if secrets:
+            _secrets[key] = secrets
+            stored = {**body, **{field: SECRET_MARKER for field in secrets}}
+    connection = get_connection()
+    with connection:
+        connection.execute(
+            "INSERT INTO outbox (idempotency_key, method, path, body, created_at) VALUES (?, ?, ?, ?, ?)",
+            (key, method, path, json.dumps(stored), time.time())
+        )
+    log_event("outbox.enqueue", method=method, path=path)
+    start_outbox_worker()
+    _wake.set()
+    return key
+
+# Función para convertir una fila de la cola en un diccionario
+def _item(row):
+    body = json.loads(row["body"])
+    secrets = _secrets.get(row["idempotency_key"], {})
+    if isinstance(body, dict):
+        body = {field: secrets.get(field, value) if value == SECRET_MARKER else value for field, value in body.items()}
+    return {**dict(row), "body": body}
+
+# Función para saber si a una escritura le faltan datos sensibles (se perdieron al reiniciar la aplicación)
+def _missing_secrets(item):
+    return isinstance(item["body"], dict) and SECRET_MARKER in item["body"].values()
+
+# Función para quitar los datos sensibles de las escrituras guardadas por versiones anteriores de la cola
+def _scrub_secrets():
+    connection = get_connection()
+    with connection:
+        for field in SECRET_FIELDS:
+            connection.execute(
+                f"UPDATE outbox SET body = json_set(body, '$.{field}', json(?)) "
+                f"WHERE json_valid(body) AND json_type(body, '$.{field}') NOT IN ('object', 'null')",
+                (json.dumps(SECRET_MARKER),)
+            )
+
+# Función para contar las escrituras pendientes y fallidas
+def outbox_counts():
+    rows = get_connection().execute("SELECT status, COUNT(*) AS total FROM outbox GROUP BY status").fetchall()
+    counts = {"pending": 0, "failed": 0}
+    counts.update({row["status"]: row["total"] for row in rows})
+    return counts
+
+# Función para recordar una escritura de la sesión (`label` la describe en los mensajes; el resto de los datos
+# quedan disponibles para la vista, por ejemplo, el id de la solicitud)
+def track(key, label, **info):
+    st.session_state.setdefault(SESSION_WRITES_KEY, {})[key] = {"label": label, **info}
+
+# Función para obtener (y dejar de recordar) las escrituras de la sesión que ya se procesaron: (enviadas, fallidas).
+# Las enviadas ya no están en la cola; las fallidas quedan marcadas en ella con su error.
+def session_outcomes():
+    tracked = st.session_state.get(SESSION_WRITES_KEY, {})
+    keys = list(tracked)
+    rows = {}
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        query = f"SELECT idempotency_key, status, last_error FROM outbox WHERE idempotency_key IN ({', '.join('?' * len(chunk))})"
+        rows.update({row["idempotency_key"]: row for row in get_connection().execute(query, chunk)})
+
+    sent, failed = [], []
+    for key in keys:
+        row = rows.get(key)
+        if row is None:
+            sent.append(tracked.pop(key))
+        elif row["status"] == "failed":
+            failed.append({**tracked.pop(key), "error": row["last_error"]})
+    return sent, failed
+
+# Función para mostrar cuántas escrituras están pendientes de envío y el resultado de las de esta sesión.
+# Devuelve las escrituras de la sesión que fallaron.
+def show_outbox_status():
+    counts = outbox_counts()
+    if counts["pending"]:
+        st.info(f"Hay {counts['pending']} cambio(s) pendiente(s) de envío al servidor.", icon="⏳")
+
+    sent, failed = session_outcomes()
+    if sent:
+        st.success(f"{len(sent)} cambio(s) guardado(s) en el servidor.")
+    if failed:
+        detail = "; ".join(f"{write['label']}: {write['error']}" for write in failed)
+        st.error(f"No se pudieron guardar {len(failed)} cambio(s) en el servidor ({detail}).")
+    return failed
+
+# Función para llamar a las funciones registradas para una escritura. Devuelve True si alguna la reflejó en los listados.
+def _notify(callbacks, item, result):
+    paths = {item["path"], endpoint_of(item["path"])}
+    handled = False
+    for path in paths:
+        for callback in callbacks.get(path, []):
+            try:
+                handled = bool(callback(item, result)) or handled
+            except Exception as e:
+                log_event("outbox.callback_error", path=item["path"], error=repr(e))
+    return handled
+
+# Función para programar el reintento de una escritura
+def _schedule_retry(connection, item, error):
+    delay = min(OUTBOX_RETRY_MAX_WAIT, OUTBOX_FLUSH_INTERVAL * 2 ** item["attempts"])
+    with connection:
+        connection.execute(
+            "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE id = ?",
+            (time.time() + delay, error, item["id"])
+        )
+
+# Función para enviar una escritura
+def _send(item):
+    if _missing_secrets(item):
+        return None
+    return api_request(item["method"], item["path"], json=item["body"], headers={"Idempotency-Key": item["idempotency_key"]})
+
+# Función para agrupar las escrituras que se pueden enviar a la vez: modificaciones consecutivas de registros
+# distintos del mismo listado. El resto forma grupos de una sola escritura, que se envían en orden.
+def _runs(items):
+    runs = []
+    for item in items:
+        run = runs[-1] if runs else []
+        if (
+            run
+            and item["method"] == run[0]["method"] == "PUT"
+            and endpoint_of(item["path"]) == endpoint_of(run[0]["path"])
+            and all(other["path"] != item["path"] for other in run)
+        ):
+            run.append(item)
+        else:
+            runs.append([item])
+    return runs
+
+# Función para enviar un lote de escrituras pendientes. Devuelve cuántas se procesaron.
+def flush_outbox(batch_size=OUTBOX_BATCH_SIZE):
+    connection = get_connection()
+    rows = connection.execute("SELECT * FROM outbox WHERE status = 'pending' ORDER BY id LIMIT ?", (batch_size,)).fetchall()
+
+    # Las escrituras se envían en orden: si la primera está esperando un reintento, el lote espera con ella
+    if not rows or rows[0]["next_attempt_at"] > time.time():
+        return 0
+
+    processed, written = 0, set()
+    with span("outbox.flush", items=len(rows)) as tags:
+        for run in _runs(map(_item, rows)):
+            retry = False
+            for item, response, error in run_bounded(_send, run, BATCH_MAX_WORKERS):
+                if error is not None and not isinstance(error, requests.RequestException):
+                    raise error
+
+                if error is None and response is None:
+                    # No se envió: sus datos sensibles no se guardan en la cola y se perdieron al reiniciar
+                    failure = "datos sensibles no disponibles tras reiniciar la aplicación"
+                    unconfirmed = True
+                else:
+                    failure = type(error).__name__ if error is not None else f"HTTP {response.status_code}"
+                    unconfirmed = error is not None or response.status_code in RETRY_STATUS
+                    if unconfirmed:
+                        # El backend no responde: se reintenta más tarde, junto con el resto del lote
+                        if can_resend(item["method"], error, None if error is not None else response.status_code):
+                            _schedule_retry(connection, item, failure)
+                            retry = True
+                            continue
+                        # La creación pudo haber llegado al backend: reenviarla podría duplicarla
+                        failure += " (sin confirmar: pudo haberse guardado)"
+                        written.add(endpoint_of(item["path"]))
+
+                processed += 1
+                _secrets.pop(item["idempotency_key"], None)
+                if not unconfirmed and response.ok:
+                    with connection:
+                        connection.execute("DELETE FROM outbox WHERE id = ?", (item["id"],))
+                    if not _notify(_SENT_CALLBACKS, item, response):
+                        written.add(endpoint_of(item["path"]))
+                else:
+                    with connection:
+                        connection.execute(
+                            "UPDATE outbox SET status = 'failed', attempts = attempts + 1, last_error = ? WHERE id = ?",
+                            (failure, item["id"])
+                        )
+                    # Una escritura rechazada no modificó nada en el backend: no hace falta invalidar
+                    _notify(_FAILED_CALLBACKS, item, response)
+            if retry:
+                break
+
+        tags.update(processed=processed)
+
+    # Invalidar una sola vez los listados modificados por el lote
+    lists = [path for path in written if path in (API_URL_ESTIMATIONS, API_URL_REQUESTS, API_URL_USERS)]
+    if lists:
+        invalidate(*lists)
+    return processed
+
+# Función que envía la cola mientras haya escrituras listas y espera a que se encolen nuevas
+def _worker_loop():
+    while True:
+        try:
+            while flush_outbox():
+                pass
+        except Exception as e:
+            log_event("outbox.error", error=repr(e))
+        _wake.wait(OUTBOX_FLUSH_INTERVAL)
+        _wake.clear()
+
+# Función para iniciar el hilo que envía la cola (solo una vez por proceso)
+def start_outbox_worker():
+    global _worker_thread
+    if _worker_thread is not None:
+        return _worker_thread
+    with _worker_lock:
+        if _worker_thread is None:
+            _scrub_secrets()
+            _worker_thread = threading.Thread(target=_worker_loop, name="outbox", daemon=True)
+            _worker_thread.start()
+    return _worker_thread
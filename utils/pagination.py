@@ -0,0 +1,77 @@
+import math
+
+import streamlit as st
+
+# Componente de paginación compartido por las vistas de listados.
+# Cada vista usa su propia clave, de modo que la página y el tamaño de página
+# se guardan por separado en session_state ("<clave>_page" y "<clave>_page_size").
+
+PAGE_SIZE_OPTIONS = [5, 10, 25, 50, 100]
+
+# Función para obtener el tamaño de página actual de un paginador
+def get_page_size(key, default=10):
+    size_key = f"{key}_page_size"
+    if size_key not in st.session_state:
+        st.session_state[size_key] = default
+    return st.session_state[size_key]
+
+# Función para obtener la página solicitada (sin ajustar al total de filas)
+def get_requested_page(key):
+    return st.session_state.get(f"{key}_page", 1)
+
+# Función para obtener la página actual ajustada al total de filas, junto con el total de páginas
+def get_current_page(key, total_rows, page_size):
+    total_pages = max(math.ceil(total_rows / page_size), 1)
+    page = min(max(get_requested_page(key), 1), total_pages)
+    st.session_state[f"{key}_page"] = page
+    return page, total_pages
+
+# Función para obtener solo las filas de la página actual (por posición, sin dividir todo el DataFrame)
+def paginate(df, key, default_page_size=10):
+    page_size = get_page_size(key, default_page_size)
+    page, _ = get_current_page(key, len(df), page_size)
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
+
+# Función para mostrar el paginador (página actual, selector de página y tamaño de página)
+def render_paginator(key, total_rows, page_size_options=PAGE_SIZE_OPTIONS):
+    page_size = get_page_size(key)
+    current_page, total_pages = get_current_page(key, total_rows, page_size)
+    options = sorted(set(page_size_options) | {page_size})
+
+    def update_page():
+        st.session_state[f"{key}_page"] = st.session_state[f"{key}_page_selector"]
+
+    def update_page_size():
+        st.session_state[f"{key}_page_size"] = st.session_state[f"{key}_page_size_selector"]
+        st.session_state[f"{key}_page"] = 1
+
+    paginator = st.columns([2, 1, 1])
+
+    with paginator[0]:
+        st.markdown(f"Página **{current_page}** de **{total_pages}**")
+
+    # Cambiar la página usando un selector de número
+    with paginator[1]:
+        st.number_input(
+            "Seleccionar Página",
+            min_value=1,
+            max_value=total_pages,
+            value=current_page,
+            step=1,
+            key=f"{key}_page_selector",
+            on_change=update_page,
+            label_visibility="collapsed"
+        )
+
+    # Cambiar el número de filas por página
+    with paginator[2]:
+        st.selectbox(
+            "Filas por página",
+            options=options,
+            index=options.index(page_size),
+            key=f"{key}_page_size_selector",
+            on_change=update_page_size,
+            format_func=lambda size: f"{size} por página",
+            label_visibility="collapsed"
+        )
@@ -0,0 +1,154 @@
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.config import MODEL_PATH, PREDICTION_CACHE_SIZE
+from utils.data import API_URL_PREDICT
+from utils.outbox import on_sent
+from utils.tracing import on_timing_panel
+
+# Predictor local de costos: un modelo serializado que se carga una vez por proceso y calcula en memoria,
+# usado para la vista previa instantánea de costos en los formularios. El costo oficial lo calcula y
+# guarda el backend (/estimation/predict, enviado desde la cola de escrituras).
+# Recibe filas con las columnas de entrada del modelo y devuelve el costo total.
+# No hay un predictor remoto con la misma interfaz: /estimation/predict crea una estimación en cada llamada,
+# por lo que solo se usa para guardar (utils/outbox.py para los formularios, utils/batch.py para la carga masiva).
+
+INPUT_COLUMNS = ["structureType", "abutmentType", "total_Width", "number_of_Spans", "total_Length", "year"]
+
+class LocalPredictor:
+    def __init__(self, model):
+        self.model = model
+        self.coefficients = model["coefficients"]
+
+    # Función para cargar el modelo desde su artefacto serializado (JSON)
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    # Función para calcular el costo de varias filas de forma vectorizada
+    def predict(self, rows):
+        df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(_records(rows), columns=INPUT_COLUMNS)
+        width = df["total_Width"].astype("float64").to_numpy()
+        length = df["total_Length"].astype("float64").to_numpy()
+        spans = df["number_of_Spans"].astype("float64").to_numpy()
+        years = df["year"].astype("float64").to_numpy() - self.model["base_year"]
+
+        base = (
+            self.model["intercept"]
+            + width * length * self.coefficients["area"]
+            + spans * self.coefficients["number_of_Spans"]
+            + years * self.coefficients["years_since_base"]
+        )
+        structure_factor = df["structureType"].astype("object").map(self.model["structureType_factors"]).fillna(1.0).to_numpy(dtype="float64")
+        abutment_factor = df["abutmentType"].astype("object").map(self.model["abutmentType_factors"]).fillna(1.0).to_numpy(dtype="float64")
+        return np.round(base * structure_factor * abutment_factor, 2)
+
+    def predict_one(self, row):
+        return float(self.predict([row])[0])
+
+# Caché LRU de predicciones, compartida entre sesiones.
+# La clave es la tupla normalizada de entradas, de modo que consultas idénticas
+# (o que solo difieren en mayúsculas, espacios o decimales) encuentran el costo ya calculado.
+# Solo sirve para vistas previas y consultas: /estimation/predict crea una estimación en cada
+# llamada, por lo que guardar una estimación siempre la envía al backend.
+# Los aciertos y fallos se cuentan al guardar (no en cada ejecución de la página): un acierto es una
+# estimación cuyo costo ya se conocía.
+class PredictionCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            return None
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, key, cost):
+        with self._lock:
+            self._entries[key] = cost
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+# Función para normalizar las entradas de una predicción en una clave de caché
+def normalize_inputs(row):
+    return (
+        str(row["structureType"]).strip().lower(),
+        str(row["abutmentType"]).strip().lower(),
+        round(float(row["total_Width"]), 2),
+        round(float(row["total_Length"]), 2),
+        int(row["number_of_Spans"]),
+        int(row["year"]),
+    )
+
+# Función para obtener la caché de predicciones del proceso
+@st.cache_resource(show_spinner=False)
+def get_prediction_cache():
+    return PredictionCache(PREDICTION_CACHE_SIZE)
+
+# Función para registrar un costo ya conocido (por ejemplo, el de una estimación existente)
+def remember_prediction(row, cost):
+    if cost is not None:
+        get_prediction_cache().put(normalize_inputs(row), float(cost))
+
+# Función para consultar un costo en la caché sin llamar a ningún predictor
+def lookup_prediction(row):
+    return get_prediction_cache().get(normalize_inputs(row))
+
+# Función para contar, al guardar, si el costo de una estimación ya estaba en la caché
+def record_prediction_lookup(known_cost):
+    get_prediction_cache().record(known_cost is not None)
+
+# Función para aceptar una fila suelta, una lista de filas o un DataFrame
+def _records(rows):
+    if isinstance(rows, pd.DataFrame):
+        return rows.to_dict("records")
+    if isinstance(rows, dict):
+        return [rows]
+    return list(rows)
+
+# Función para cargar el predictor local una sola vez por proceso del servidor
+@st.cache_resource(show_spinner=False)
+def get_local_predictor():
+    path = Path(MODEL_PATH)
+    if not path.is_absolute():
+        path = Path(__file__).resolve().parent.parent / path
+    return LocalPredictor.from_file(path)
+
+# Función para calcular la vista previa del costo de una fila (None si el modelo local no está disponible)
+def preview_cost(row):
+    try:
+        return get_local_predictor().predict_one(row)
+    except (OSError, KeyError, ValueError):
+        return None
+
+# Función para registrar el costo calculado por el backend para una estimación enviada desde la cola de escrituras
+def _remember_sent_prediction(item, response):
+    result = response.json()
+    remember_prediction(item["body"], result.get("total_Cost") if isinstance(result, dict) else result)
+
+on_sent(API_URL_PREDICT, _remember_sent_prediction)
+on_timing_panel("Caché de predicciones", lambda: get_prediction_cache().stats())
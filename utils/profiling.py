@@ -0,0 +1,170 @@
+import cProfile
+import os
+import pstats
+import re
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from pathlib import Path
+
+import streamlit as st
+
+from utils.config import PROFILE_DIR, PROFILE_MAX_FILES, PROFILE_TOP_FUNCTIONS
+from utils.tracing import log_event
+
+# Perfilado de CPU de las páginas para los administradores.
+# Con el parámetro ?profile=1 en la URL o el interruptor de la barra lateral, la ejecución de la página
+# (`menu.run()`) se mide con cProfile y el resultado se guarda como archivo pstats en PROFILE_DIR
+# (se conservan los PROFILE_MAX_FILES más recientes). El visor de la barra lateral (solo cuando se
+# activa) lista las capturas y muestra las funciones que más tiempo consumen; el archivo se puede
+# descargar para abrirlo con herramientas como snakeviz o flameprof (gráfico de llamas).
+
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_TOGGLE_KEY = "profile_pages"
+PROFILE_VIEWER_KEY = "show_profiles"
+
+# Orden de la tabla de funciones del visor (etiqueta -> columna)
+SORT_OPTIONS = {
+    "Tiempo acumulado": "cumtime_ms",
+    "Tiempo propio": "tottime_ms",
+    "Llamadas": "calls"
+}
+
+_FILE_PATTERN = re.compile(r"^(\d{8}-\d{6}-\d{3})_(.+)_(\d+)ms\.pstats$")
+
+_prune_lock = threading.Lock()
+
+# Función para convertir el título de la página en un nombre de archivo
+def _slug(text):
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "pagina"
+
+# Función para obtener la carpeta de las capturas (relativa a la raíz del proyecto)
+def _profile_dir():
+    directory = Path(PROFILE_DIR)
+    if not directory.is_absolute():
+        directory = Path(__file__).resolve().parent.parent / directory
+    return directory
+
+# Función para mostrar el interruptor de perfilado (el parámetro de la URL lo activa al entrar)
+def profiling_requested():
+    if PROFILE_TOGGLE_KEY not in st.session_state:
+        st.session_state[PROFILE_TOGGLE_KEY] = st.query_params.get(PROFILE_QUERY_PARAM, "").lower() in ("1", "true", "on")
+    return st.sidebar.toggle("🔬 Perfilar página", key=PROFILE_TOGGLE_KEY)
+
+# Función para borrar las capturas más antiguas
+def _prune():
+    with _prune_lock:
+        for profile in list_profiles()[PROFILE_MAX_FILES:]:
+            try:
+                os.remove(_profile_dir() / profile["file"])
+            except FileNotFoundError:
+                pass
+
+# Función para guardar una captura en PROFILE_DIR
+def _save(profiler, page, duration_ms):
+    _profile_dir().mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+    file = f"{stamp}_{_slug(page)}_{round(duration_ms)}ms.pstats"
+    profiler.dump_stats(_profile_dir() / file)
+    _prune()
+    log_event("profile.saved", page=page, file=file, duration_ms=round(duration_ms, 2))
+    return file
+
+# Contexto para perfilar la ejecución de una página (si no está activado no hace nada).
+# La captura se guarda también cuando la página termina con st.rerun() o st.stop().
+@contextmanager
+def profile_page(page, enabled):
+    if not enabled:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        try:
+            st.session_state["last_profile"] = _save(profiler, page, (time.perf_counter() - started) * 1000)
+        except OSError as e:
+            log_event("profile.error", page=page, error=str(e))
+
+# Función para listar las capturas guardadas, de la más reciente a la más antigua
+def list_profiles():
+    try:
+        files = os.listdir(_profile_dir())
+    except FileNotFoundError:
+        return []
+
+    profiles = []
+    for file in files:
+        match = _FILE_PATTERN.match(file)
+        if match:
+            stamp, page, duration_ms = match.groups()
+            profiles.append({"file": file, "captured_at": stamp, "page": page, "duration_ms": int(duration_ms)})
+    return sorted(profiles, key=lambda profile: profile["captured_at"], reverse=True)
+
+# Función para obtener las funciones con más tiempo de una captura (una captura no cambia una vez guardada)
+@st.cache_data(max_entries=PROFILE_MAX_FILES, show_spinner=False)
+def profile_top_functions(file, sort_by="cumtime_ms", limit=PROFILE_TOP_FUNCTIONS):
+    # pandas se importa aquí para no retrasar la primera carga de la página de inicio de sesión
+    import pandas as pd
+
+    stats = pstats.Stats(str(_profile_dir() / file))
+    rows = []
+    for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        location = function if filename == "~" else f"{function} ({os.path.basename(filename)}:{line})"
+        rows.append({
+            "function": location,
+            "calls": calls,
+            "tottime_ms": tottime * 1000,
+            "cumtime_ms": cumtime * 1000
+        })
+    return pd.DataFrame(rows).sort_values(sort_by, ascending=False).head(limit)
+
+# Función para mostrar el visor de capturas en la barra lateral.
+# Las capturas solo se listan y se leen cuando el administrador activa el visor.
+def render_profile_viewer():
+    if not st.sidebar.toggle("🔬 Ver perfiles de CPU", key=PROFILE_VIEWER_KEY):
+        return
+
+    profiles = list_profiles()
+    with st.sidebar.container(border=True):
+        if not profiles:
+            st.caption("No hay capturas. Activa «Perfilar página» o agrega ?profile=1 a la URL.")
+            return
+
+        files = [profile["file"] for profile in profiles]
+        last_profile = st.session_state.get("last_profile")
+        selected = st.selectbox(
+            "Captura",
+            files,
+            index=files.index(last_profile) if last_profile in files else 0,
+            format_func=lambda file: next(f"{p['captured_at']} · {p['page']} · {p['duration_ms']} ms" for p in profiles if p["file"] == file)
+        )
+        sort_label = st.selectbox("Ordenar por", list(SORT_OPTIONS))
+
+        try:
+            df_functions = profile_top_functions(selected, SORT_OPTIONS[sort_label])
+            with open(_profile_dir() / selected, "rb") as profile_file:
+                content = profile_file.read()
+        except (OSError, ValueError, EOFError):
+            st.warning("No se pudo leer la captura.")
+            return
+
+        st.dataframe(
+            df_functions[["function", "calls", "tottime_ms", "cumtime_ms"]],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "function": "Función",
+                "calls": "Llamadas",
+                "tottime_ms": st.column_config.NumberColumn("Propio (ms)", format="%.1f"),
+                "cumtime_ms": st.column_config.NumberColumn("Acumulado (ms)", format="%.1f")
+            }
+        )
+        st.download_button("Descargar .pstats", content, file_name=selected)
@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.tracing import span
+
+# Índice de búsqueda para los filtros de texto de los listados.
+# Por cada columna se guardan los valores distintos en minúsculas y el código de cada fila,
+# más un índice de trigramas sobre los valores distintos. Una búsqueda solo recorre los
+# valores distintos candidatos y luego marca las filas con una operación vectorizada.
+# El término se compara como texto literal (los caracteres especiales de regex no se interpretan).
+
+NGRAM_SIZE = 3
+
+# Número de búsquedas recientes que se guardan por índice (por ejemplo, al cambiar de página)
+RESULT_CACHE_SIZE = 64
+
+# Función para obtener los trigramas de un texto
+def _ngrams(text):
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+class SearchIndex:
+    def __init__(self, df, columns):
+        self.size = len(df)
+        self._columns = []
+        for column in columns:
+            if column in df and isinstance(df[column].dtype, pd.CategoricalDtype):
+                # Columnas categóricas: los códigos ya son la factorización (los nulos, -1, pasan al último valor)
+                uniques = [str(value).lower() for value in df[column].cat.categories] + [""]
+                codes = df[column].cat.codes.to_numpy().astype(np.int64)
+                codes[codes < 0] = len(uniques) - 1
+            else:
+                values = df[column].astype("string").fillna("").str.lower() if column in df else pd.Series([""] * self.size)
+                codes, uniques = pd.factorize(values, sort=False)
+                uniques = list(uniques)
+
+            # Postings: trigrama -> posiciones de los valores distintos que lo contienen
+            postings = {}
+            for position, value in enumerate(uniques):
+                for ngram in _ngrams(value):
+                    postings.setdefault(ngram, []).append(position)
+            postings = {ngram: np.array(positions, dtype=np.int64) for ngram, positions in postings.items()}
+
+            self._columns.append((np.asarray(codes), uniques, postings))
+
+        self._results = OrderedDict()
+        self._results_lock = threading.Lock()
+
+    # Función para obtener las posiciones de los valores distintos que contienen el término
+    def _matching_values(self, uniques, postings, term):
+        if len(term) < NGRAM_SIZE:
+            return [position for position, value in enumerate(uniques) if term in value]
+
+        # Intersectar empezando por los trigramas menos frecuentes
+        ngram_postings = [postings.get(ngram) for ngram in _ngrams(term)]
+        if any(positions is None for positions in ngram_postings):
+            return []
+        ngram_postings.sort(key=len)
+
+        candidates = ngram_postings[0]
+        for positions in ngram_postings[1:]:
+            candidates = np.intersect1d(candidates, positions, assume_unique=True)
+            if candidates.size == 0:
+                return []
+
+        # Un término de exactamente un trigrama no necesita verificación
+        if len(term) == NGRAM_SIZE:
+            return candidates
+        return [position for position in candidates if term in uniques[position]]
+
+    # Función para obtener las posiciones (filas) que contienen el término en alguna columna
+    def search(self, term):
+        term = (term or "").strip().lower()
+        if not term:
+            return np.arange(self.size)
+
+        with self._results_lock:
+            if term in self._results:
+                self._results.move_to_end(term)
+                return self._results[term]
+
+        mask = np.zeros(self.size, dtype=bool)
+        for codes, uniques, postings in self._columns:
+            matching = self._matching_values(uniques, postings, term)
+            if len(matching):
+                hits = np.zeros(len(uniques), dtype=bool)
+                hits[matching] = True
+                mask |= hits[codes]
+        positions = np.flatnonzero(mask)
+
+        with self._results_lock:
+            self._results[term] = positions
+            if len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return positions
+
+# Función para obtener el índice de búsqueda de un conjunto de datos.
+# Se guarda por versión del conjunto de datos y se comparte entre reruns y sesiones.
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_search_index(dataset_key, _df, columns):
+    return SearchIndex(_df, columns)
+
+# Función para filtrar un DataFrame por un término usando el índice de búsqueda
+def search_frame(df, term, dataset_key, columns):
+    if not (term or "").strip():
+        return df
+    with span("transform.search", rows=len(df)) as tags:
+        index = get_search_index(dataset_key, df, tuple(columns))
+        matches = index.search(term)
+        tags["matches"] = len(matches)
+        return df.iloc[matches]
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pandas as pd
+import requests
+
+from utils.api_client import api_get
+from utils.config import SNAPSHOT_DIR, SNAPSHOT_SYNC_INTERVAL
+from utils.data import API_URL_ESTIMATIONS, fetch_or_timeout, mark_data_fresh, mark_data_stale, on_invalidate
+from utils.frames import compact_estimations, flatten_estimations, merge_estimations
+from utils.tracing import span
+
+# Sincronización incremental de estimaciones en una instantánea local en Parquet.
+#
+# Protocolo con el backend:
+#   GET /estimation?updated_since=<marca>  (con If-None-Match: <etag>)
+#     304                -> no hubo cambios
+#     {"items": [...], "deleted": [ids], "watermark": <nueva marca>}
+#                        -> registros creados/modificados y eliminados desde la marca
+#     [...]              -> el backend no soporta deltas: se reemplaza la instantánea completa
+#
+# En frío la instantánea se lee del disco; en caliente solo se descarga el delta.
+# La instantánea se comparte entre todas las sesiones del proceso. La descarga se hace sin el candado
+# (como máximo una a la vez, ver `fetch_or_timeout`) y su resultado se aplica de una sola vez al terminar;
+# mientras tanto, las sesiones siguen viendo la instantánea anterior.
+
+SNAPSHOT_NAME = "estimations"
+
+_state = {"df": None, "watermark": None, "etag": None, "version": None, "fetched_at": None, "synced_at": 0.0, "stale": True}
+_lock = threading.Lock()
+_disk_lock = threading.Lock()
+
+# Función para obtener las rutas del archivo Parquet y de sus metadatos
+def _snapshot_paths():
+    directory = Path(SNAPSHOT_DIR)
+    if not directory.is_absolute():
+        directory = Path(__file__).resolve().parent.parent / directory
+    return directory / f"{SNAPSHOT_NAME}.parquet", directory / f"{SNAPSHOT_NAME}.meta.json"
+
+# Función para leer la instantánea del disco (carga en frío)
+def _load_from_disk():
+    data_path, meta_path = _snapshot_paths()
+    if not (data_path.exists() and meta_path.exists()):
+        return
+    try:
+        df = compact_estimations(pd.read_parquet(data_path))
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return
+    _state.update(df=df, watermark=meta.get("watermark"), etag=meta.get("etag"), version=meta.get("version"), fetched_at=meta.get("fetched_at"))
+
+# Función para guardar una instantánea en el disco (escritura atómica, una a la vez)
+def _save_to_disk(state):
+    data_path, meta_path = _snapshot_paths()
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with _disk_lock:
+        tmp_data_path = data_path.with_suffix(".parquet.tmp")
+        state["df"].to_parquet(tmp_data_path, index=False)
+        os.replace(tmp_data_path, data_path)
+
+        tmp_meta_path = meta_path.with_suffix(".json.tmp")
+        with open(tmp_meta_path, "w", encoding="utf-8") as f:
+            json.dump({"watermark": state["watermark"], "etag": state["etag"], "version": state["version"], "fetched_at": state["fetched_at"]}, f)
+        os.replace(tmp_meta_path, meta_path)
+
+# Función para pedir al backend los cambios desde la última marca de sincronización de `state`.
+# Devuelve los campos de la instantánea que cambian.
+def _fetch_changes(state):
+    headers = {"If-None-Match": state["etag"]} if state["etag"] else {}
+    params = {"updated_since": state["watermark"]} if state["watermark"] is not None else {"updated_since": 0}
+    response = api_get(API_URL_ESTIMATIONS, params=params, headers=headers)
+
+    if response.status_code == 304:
+        return {"fetched_at": time.time()}
+    response.raise_for_status()
+    changes = {"fetched_at": time.time()}
+    payload = response.json()
+
+    if isinstance(payload, list):
+        # El backend no soporta deltas: reemplazar toda la instantánea
+        changes.update(df=compact_estimations(flatten_estimations(payload)), watermark=None)
+    else:
+        if not payload.get("items") and not payload.get("deleted") and state["df"] is not None:
+            changes.update(watermark=payload.get("watermark"), etag=response.headers.get("ETag"))
+            return changes
+        changes.update(
+            df=merge_estimations(state["df"], payload.get("items", []), payload.get("deleted", [])),
+            watermark=payload.get("watermark")
+        )
+
+    # La nueva versión depende de la anterior y del delta recibido
+    digest = hashlib.sha1((state["version"] or "").encode())
+    digest.update(response.content)
+    changes.update(etag=response.headers.get("ETag"), version=digest.hexdigest())
+    return changes
+
+# Función para sincronizar la instantánea con el backend. Solo toma el candado para leer el estado
+# y para aplicar los cambios; una invalidación recibida durante la descarga fuerza otra sincronización.
+def _sync():
+    with _lock:
+        state = dict(_state)
+        _state["stale"] = False
+    try:
+        changes = _fetch_changes(state)
+    except Exception:
+        mark_stale()
+        raise
+
+    with _lock:
+        _state.update(changes, synced_at=time.monotonic())
+        state = dict(_state)
+    mark_data_fresh(API_URL_ESTIMATIONS)
+    if "df" in changes:
+        _save_to_disk(state)
+
+# Función para obtener la instantánea de estimaciones sincronizada, junto con su versión.
+# Devuelve la última instantánea disponible si el backend falla, o (None, None) si no hay ninguna.
+def load_estimations_snapshot():
+    with _lock:
+        if _state["df"] is None:
+            _load_from_disk()
+        due = _state["stale"] or time.monotonic() - _state["synced_at"] >= SNAPSHOT_SYNC_INTERVAL
+        has_previous = _state["df"] is not None
+
+    if due:
+        try:
+            with span("snapshot.sync", watermark=_state["watermark"]):
+                fetch_or_timeout(SNAPSHOT_NAME, _sync, has_previous)
+        except (requests.RequestException, ValueError, FutureTimeoutError):
+            # Se sigue mostrando la instantánea anterior, marcada como desactualizada
+            if has_previous:
+                mark_data_stale(API_URL_ESTIMATIONS, _state["fetched_at"] or time.time())
+
+    with _lock:
+        if _state["df"] is None:
+            return None, None
+        return _state["df"], _state["version"]
+
+# Función para forzar una sincronización en la próxima carga (se llama al invalidar /estimation)
+def mark_stale():
+    _state["stale"] = True
+
+on_invalidate(API_URL_ESTIMATIONS, mark_stale)
@@ -0,0 +1,166 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+import streamlit as st
+
+from utils.config import TRACE_BACKUP_COUNT, TRACE_ENABLED, TRACE_FILE, TRACE_MAX_BYTES
+
+# Trazas de latencia por página.
+# Cada ejecución del script abre una traza (`start_trace`) etiquetada con la página y el rol del
+# usuario; las llamadas al backend, las transformaciones de datos y las fases de renderizado se
+# miden con `span`. Cada span se escribe como una línea JSON en TRACE_FILE (con rotación por
+# tamaño) y se guarda en la traza actual para el panel de tiempos de los administradores.
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+_logger = None
+_logger_lock = threading.Lock()
+
+# Función para obtener la ruta del archivo de trazas (relativa a la raíz del proyecto)
+def _trace_path():
+    path = Path(TRACE_FILE)
+    if not path.is_absolute():
+        path = Path(__file__).resolve().parent.parent / path
+    return path
+
+# Función para crear el logger que escribe los spans en el archivo JSONL rotativo
+def _build_logger():
+    path = _trace_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(path, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUP_COUNT, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    logger = logging.getLogger("construction_cost.trace")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(handler)
+    return logger
+
+# Función para obtener el logger de trazas compartido (se crea la primera vez)
+def _get_logger():
+    global _logger
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                _logger = _build_logger()
+    return _logger
+
+# Función para escribir un span en el archivo de trazas (un error de escritura no debe romper la página)
+def _write(record):
+    try:
+        _get_logger().info(json.dumps(record, default=str, ensure_ascii=False))
+    except Exception:
+        pass
+
+# Función para iniciar la traza de la ejecución actual del script
+def start_trace(**tags):
+    trace = {"trace_id": uuid.uuid4().hex, "tags": tags, "spans": []}
+    _current_trace.set(trace)
+    _current_span.set(None)
+    return trace
+
+# Función para agregar etiquetas (por ejemplo, la página o el rol) a la traza actual
+def set_trace_tags(**tags):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace["tags"].update(tags)
+
+# Función para obtener los spans registrados en la traza actual
+def get_trace_spans():
+    trace = _current_trace.get()
+    return list(trace["spans"]) if trace is not None else []
+
+# Función para medir un bloque de código.
+# Devuelve un diccionario de etiquetas que el bloque puede completar (por ejemplo, con el número de filas).
+@contextmanager
+def span(name, **tags):
+    if not TRACE_ENABLED:
+        yield tags
+        return
+
+    trace = _current_trace.get()
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _current_span.get()
+    token = _current_span.set(span_id)
+    started_at = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield tags
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        _current_span.reset(token)
+
+        record = {
+            "ts": started_at,
+            "trace_id": trace["trace_id"] if trace is not None else None,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "duration_ms": round(duration_ms, 3),
+            "thread": threading.current_thread().name,
+        }
+        if trace is not None:
+            record.update(trace["tags"])
+        record.update(tags)
+        if error is not None:
+            record["error"] = error
+
+        if trace is not None:
+            trace["spans"].append(record)
+        _write(record)
+
+# Función para registrar un evento puntual con sus etiquetas (por ejemplo, el tiempo hasta el primer renderizado)
+def log_event(name, **tags):
+    if not TRACE_ENABLED:
+        return
+
+    trace = _current_trace.get()
+    record = {
+        "ts": time.time(),
+        "trace_id": trace["trace_id"] if trace is not None else None,
+        "parent_id": _current_span.get(),
+        "name": name,
+        "thread": threading.current_thread().name,
+    }
+    if trace is not None:
+        record.update(trace["tags"])
+        trace["spans"].append(record)
+    record.update(tags)
+    _write(record)
+
+# Estadísticas adicionales del panel de tiempos (título -> función que devuelve un diccionario),
+# registradas por los módulos que las llevan (por ejemplo, la caché de predicciones)
+_PANEL_STATS = {}
+
+# Función para registrar unas estadísticas que se muestran en el panel de tiempos
+def on_timing_panel(title, stats):
+    _PANEL_STATS[title] = stats
+
+# Función para mostrar en la barra lateral los tiempos de la ejecución actual
+def render_timing_panel():
+    spans = get_trace_spans()
+    if not spans:
+        return
+
+    # pandas se importa aquí para no retrasar la primera carga de la página de inicio de sesión
+    import pandas as pd
+
+    with st.sidebar.expander("⏱️ Tiempos de la página"):
+        df_spans = pd.DataFrame(spans).sort_values("ts")
+        columns = ["name", "duration_ms"] + [column for column in ["path", "status", "rows", "error"] if column in df_spans.columns]
+        st.dataframe(df_spans[columns], hide_index=True, use_container_width=True)
+        for title, stats in _PANEL_STATS.items():
+            st.caption(title)
+            st.dataframe(pd.DataFrame([stats()]), hide_index=True, use_container_width=True)
@@ -0,0 +1,53 @@
+# Vocabularios fijos de los tipos de superestructura y estribo que acepta el modelo
+
+# Definir opciones de superestructura
+superestructura_optiones = [
+    "adjacent box beams",
+    "adjacent slab beams",
+    "arch",
+    "bulb tee",
+    "channel beam",
+    "concrete segmental box girder",
+    "culvert",
+    "deck arches",
+    "i-beams",
+    "inverset",
+    "multi girder curved",
+    "multi girder straight",
+    "next beam",
+    "next beam type d",
+    "next beam type f",
+    "precast box culvert",
+    "prestressed adjacent box beams",
+    "prestressed adjacent slab beams",
+    "prestressed bulb tees",
+    "prestressed I-beams",
+    "prestressed spread box beams",
+    "segmental box girder",
+    "spread box beams",
+    "steel multi girder straight",
+    "steel segmental box girder",
+    "three sided frame",
+    "through girder",
+    "through truss",
+    "truss"
+    ]
+
+# Definir opciones de estribo
+estribo_optiones = [
+    "abutmentless",
+    "cantilever stems",
+    "culvert",
+    "existing",
+    "footing only",
+    "integral",
+    "integral & gravity",
+    "invert slab",
+    "other",
+    "semi-integral",
+    "short stem",
+    "solid cantilever",
+    "stem",
+    "stub cantilever",
+    "stub on msess wall"
+    ]
@@ -0,0 +1,84 @@
+import importlib
+import threading
+import time
+
+from utils.config import PREWARM_MODULES
+from utils.tracing import log_event, span
+
+# Arranque en caliente del servidor.
+# `start_prewarm` se llama al iniciar el proceso (ver serve.py): en un hilo de fondo importa los
+# módulos pesados que usan las vistas y llena las cachés compartidas (índice de usuarios,
+# estimaciones, solicitudes, predictor local). La primera visita después de un despliegue
+# encuentra todo cargado, igual que las siguientes; además, la primera llamada despierta al
+# backend mientras nadie espera. `record_first_render` registra una vez por proceso el tiempo
+# desde el inicio del servidor hasta el primer renderizado.
+
+_server_started_at = time.monotonic()
+_prewarm_thread = None
+_first_render_lock = threading.Lock()
+_first_render_recorded = False
+
+# Función para esperar a que exista el runtime de Streamlit (las cachés deben crearse dentro de él)
+def _wait_for_runtime(timeout=60):
+    from streamlit.runtime import Runtime
+
+    deadline = time.monotonic() + timeout
+    while not Runtime.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+# Función para importar los módulos pesados que todavía no se cargaron
+def _import_modules():
+    for module in PREWARM_MODULES:
+        with span("startup.import", module=module):
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                pass
+
+# Función para llenar las cachés compartidas; los errores se ignoran (la vista volverá a intentarlo)
+def _warm_caches():
+    from utils.data import API_URL_REQUESTS, fetch_role_index, load_dataset
+    from utils.frames import load_estimations_frame
+    from utils.predictor import get_local_predictor
+
+    steps = [
+        ("users", fetch_role_index),
+        ("estimations", load_estimations_frame),
+        ("requests", lambda: load_dataset(API_URL_REQUESTS)),
+        ("local_predictor", get_local_predictor),
+    ]
+    for name, step in steps:
+        with span("startup.prewarm", step=name):
+            try:
+                step()
+            except Exception:
+                pass
+
+# Función para precargar módulos y cachés (bloqueante)
+def prewarm():
+    _wait_for_runtime()
+    with span("startup.prewarm_total"):
+        _import_modules()
+        _warm_caches()
+
+# Función para iniciar la precarga en un hilo de fondo (solo una vez por proceso)
+def start_prewarm():
+    global _prewarm_thread
+    if _prewarm_thread is None:
+        _prewarm_thread = threading.Thread(target=prewarm, name="prewarm", daemon=True)
+        _prewarm_thread.start()
+    return _prewarm_thread
+
+# Función para registrar el tiempo hasta el primer renderizado del proceso
+def record_first_render(page):
+    global _first_render_recorded
+    with _first_render_lock:
+        if _first_render_recorded:
+            return
+        _first_render_recorded = True
+    log_event(
+        "startup.first_render",
+        page=page,
+        since_start_ms=round((time.monotonic() - _server_started_at) * 1000, 3),
+        prewarm=_prewarm_thread is not None
+    )
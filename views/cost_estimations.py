@@ -1,66 +1,37 @@
 import streamlit as st
 import pandas as pd
-import requests
-import math
-import time
 from streamlit_cookies_controller import CookieController
+from utils.batch import read_batch_file, results_to_csv, submit_batch, validate_batch
+from utils.config import ESTIMATIONS_DELTA_SYNC, ESTIMATIONS_SERVER_PAGING
+from utils.data import API_URL_ESTIMATIONS, API_URL_PREDICT, API_URL_REQUESTS, invalidate, load_estimations_page, server_paging_supported, show_stale_notice
+from utils.flash import flash
+from utils.frames import flatten_estimations, load_estimations_frame
+from utils.grid import GRID_PAGE_SIZE_OPTIONS, paginator_settings, render_grid, use_grid
+from utils.optimistic import submit
+from utils.outbox import show_outbox_status
+from utils.pagination import get_current_page, get_page_size, get_requested_page, paginate, render_paginator
+from utils.predictor import lookup_prediction, preview_cost, record_prediction_lookup, remember_prediction
+from utils.search import search_frame
+from utils.tracing import span
+from utils.vocabularies import estribo_optiones, superestructura_optiones
 
 cookie_controller = CookieController()
 
-# Definir la URL base del backend
-base_url = "https://tesis-backend-nxpy.onrender.com"
-
-# Definir opciones de superestructura
-superestructura_optiones = [
-    "adjacent box beams",
-    "adjacent slab beams",
-    "arch",
-    "bulb tee",
-    "channel beam",
-    "concrete segmental box girder",
-    "culvert",
-    "deck arches",
-    "i-beams",
-    "inverset",
-    "multi girder curved",
-    "multi girder straight",
-    "next beam",
-    "next beam type d",
-    "next beam type f",
-    "precast box culvert",
-    "prestressed adjacent box beams",
-    "prestressed adjacent slab beams",
-    "prestressed bulb tees",
-    "prestressed I-beams",
-    "prestressed spread box beams",
-    "segmental box girder",
-    "spread box beams",
-    "steel multi girder straight",
-    "steel segmental box girder",
-    "three sided frame",
-    "through girder",
-    "through truss",
-    "truss"
-    ]
-
-# Definir opciones de estribo
-estribo_optiones = [
-    "abutmentless",
-    "cantilever stems",
-    "culvert",
-    "existing",
-    "footing only",
-    "integral",
-    "integral & gravity",
-    "invert slab",
-    "other",
-    "semi-integral",
-    "short stem",
-    "solid cantilever",
-    "stem",
-    "stub cantilever",
-    "stub on msess wall"
-    ]
+# Clave del paginador de esta vista
+PAGINATOR_KEY = "estimations"
+
+# Endpoint para crear solicitudes de edición o eliminación
+API_URL_CREATE_REQUEST = "/request/create"
+
+# Columnas mostradas en el listado de estimaciones
+TABLE_COLUMNS = {
+    "structureType": "Tipo de Superestructura",
+    "abutmentType": "Tipo de Estribo",
+    "total_Width": "Ancho Total",
+    "number_of_Spans": "Número de Tramos",
+    "total_Length": "Longitud Total",
+    "total_Cost": "Costo Total"
+}
 
 # Inicializar el estado de la sesión para la creación o edición de un proyecto
 if "create_project" not in st.session_state:
@@ -75,6 +46,17 @@ if "edit_project" not in st.session_state:
 if "project_to_edit" not in st.session_state:
     st.session_state["project_to_edit"] = None
 
+if "batch_project" not in st.session_state:
+    st.session_state["batch_project"] = False
+    st.session_state["batch_results"] = None
+
+# Función para mostrar la vista previa del costo calculada con el modelo local
+def show_cost_preview(data):
+    cost = preview_cost(data)
+    if cost is not None:
+        st.metric("Costo Estimado (vista previa)", f"{cost:,.2f}")
+        st.caption("Vista previa calculada localmente. El costo oficial se calcula al guardar en el backend.")
+
 # Función para manejar el formulario de creación de estimación
 def handle_create_project():
     st.title("Crear Presupuesto")
@@ -87,26 +69,33 @@ def handle_create_project():
     tramos = st.number_input("Número de Tramos", min_value=1, step=1, format="%d", value=1)
     año = st.number_input("Año de Construcción", min_value=1900, max_value=2100, step=1, format="%d", value=2024)
 
+    # Preparar datos para la creación del presupuesto
+    data = {
+        "structureType": tipo_superestructura,
+        "abutmentType": tipo_estribo,
+        "total_Width": ancho,
+        "number_of_Spans": tramos,
+        "total_Length": longitud,
+        "year": año
+    }
+
+    # Vista previa instantánea del costo: el ya calculado por el backend para estos valores o, si no, el del modelo local
+    known_cost = lookup_prediction(data)
+    if known_cost is not None:
+        st.info(f"Costo estimado por el backend para estos valores: {known_cost:,.2f}")
+    else:
+        show_cost_preview(data)
+
     col1, col2 = st.columns(2)
     with col1:
         if st.button("Guardar"):
-            # Preparar datos para la creación del presupuesto
-            data = {
-                "structureType": tipo_superestructura,
-                "abutmentType": tipo_estribo,
-                "total_Width": ancho,
-                "number_of_Spans": tramos,
-                "total_Length": longitud,
-                "year": año
-            }
-            response = requests.post(f"{base_url}/estimation/predict", json=data)
-
-            if response.status_code == 200:
-                result = response.json()
-                st.success(f"Estimación guardada con éxito.")
-            else:
-                st.error("Error al guardar la estimación.")
-            time.sleep(0.5) 
+            # El costo oficial se calcula y se guarda en el backend (en segundo plano, desde la cola de escrituras).
+            # Se envía aunque el costo ya sea conocido: cada llamada crea una estimación.
+            # La estimación se agrega de inmediato al listado, sin costo hasta que el backend lo confirme
+            # (la vista previa local no es el costo oficial y el listado es compartido por todas las sesiones)
+            record_prediction_lookup(known_cost)
+            submit(API_URL_PREDICT, data, [(API_URL_ESTIMATIONS, None, {"input_list": data, "total_Cost": None})], label="nueva estimación")
+            flash("Estimación registrada. Se guardará en el servidor en segundo plano.")
             st.session_state["create_project"] = False
             st.rerun()
 
@@ -115,11 +104,56 @@ def handle_create_project():
             st.session_state["create_project"] = False
             st.rerun()
 
+# Función para manejar la estimación masiva a partir de un archivo CSV/Excel
+def handle_batch_project():
+    st.title("Estimación Masiva")
+    st.write("Suba un archivo CSV o Excel (.xlsx) con las columnas: structureType, abutmentType, total_Width, total_Length, number_of_Spans, year.")
+
+    uploaded_file = st.file_uploader("Archivo de puentes", type=["csv", "xlsx"])
+
+    if uploaded_file is not None:
+        try:
+            valid_df, invalid_df = validate_batch(read_batch_file(uploaded_file))
+        except ValueError as e:
+            st.error(f"Archivo no válido: {e}")
+            valid_df, invalid_df = None, None
+
+        if valid_df is not None:
+            st.write(f"Filas válidas: **{len(valid_df)}** — Filas con errores: **{len(invalid_df)}**")
+            if not invalid_df.empty:
+                st.dataframe(invalid_df, use_container_width=True)
+
+            if not valid_df.empty and st.button("Enviar Estimaciones"):
+                progress_bar = st.progress(0.0, text="Enviando estimaciones...")
+
+                def update_progress(done, total):
+                    progress_bar.progress(done / total, text=f"Enviando estimaciones... {done}/{total}")
+
+                results = submit_batch(valid_df, on_progress=update_progress)
+                invalidate(API_URL_ESTIMATIONS)
+                st.session_state["batch_results"] = pd.concat([results, invalid_df], ignore_index=True)
+
+    # Mostrar el resumen y el archivo de resultados del último envío
+    results = st.session_state["batch_results"]
+    if results is not None:
+        ok = int((results["status"] == "OK").sum())
+        st.success(f"Estimaciones guardadas: {ok} de {len(results)}.")
+        st.dataframe(results, use_container_width=True)
+        st.download_button("Descargar Resultados", data=results_to_csv(results), file_name="resultados_estimaciones.csv", mime="text/csv")
+
+    if st.button("Volver"):
+        st.session_state["batch_project"] = False
+        st.session_state["batch_results"] = None
+        st.rerun()
+
 # Función para solicitar la edición de una estimación
 def handle_edit_project():
     st.title("Editar Presupuesto")
     
     project_data = st.session_state["project_to_edit"]
+
+    # El costo de la estimación original ya es conocido: registrarlo en la caché de predicciones
+    remember_prediction(project_data, project_data['total_Cost'])
     
     # Mostrar el formulario con los valores actuales
     tipo_superestructura = st.selectbox("Tipo de Superestructura", options=superestructura_optiones, index=superestructura_optiones.index(project_data['structureType']))
@@ -130,6 +164,22 @@ def handle_edit_project():
     año = st.number_input("Año de Construcción", min_value=1900, max_value=2100, step=1, format="%d", value=project_data['year'])
     cost = st.number_input("Costo Total", min_value=1000.0, step=0.01, value=project_data['total_Cost'])
 
+    new_inputs = {
+        "structureType": tipo_superestructura,
+        "abutmentType": tipo_estribo,
+        "total_Width": ancho,
+        "number_of_Spans": tramos,
+        "total_Length": longitud,
+        "year": año
+    }
+
+    # Si los nuevos valores ya fueron estimados por el backend, mostrar ese costo; si no, la vista previa local
+    known_cost = lookup_prediction(new_inputs)
+    if known_cost is not None:
+        st.info(f"Costo estimado por el backend para estos valores: {known_cost:,.2f}")
+    else:
+        show_cost_preview(new_inputs)
+
     col1, col2 = st.columns(2)
     with col1:
         if st.button("Guardar Cambios"):
@@ -164,14 +214,10 @@ def handle_edit_project():
                 "status": "Pendiente"  # O establece esto según tu lógica
             }
 
-            # Enviar el request a la API
-            response = requests.post(f"{base_url}/request/create", json=data)
-
-            if response.status_code == 200:
-                st.success("Solicitud de actualización creada con éxito.")
-            else:
-                st.error("Error al crear la solicitud de actualización.")
-            time.sleep(0.5) 
+            # Encolar el request para enviarlo a la API en segundo plano (se muestra de inmediato en las solicitudes)
+            record_prediction_lookup(known_cost)
+            submit(API_URL_CREATE_REQUEST, data, [(API_URL_REQUESTS, None, data)], label="solicitud de edición")
+            flash("Solicitud de actualización registrada. Se enviará al servidor en segundo plano.")
             st.session_state["edit_project"] = False
             st.session_state["project_to_edit"] = None
             st.rerun()
@@ -215,16 +261,45 @@ def handle_delete_project(id):
         "status": "Pendiente"  # Establecer esto según tu lógica
     }
 
-    # Enviar el request a la API
-    response = requests.post(f"{base_url}/request/create", json=data)
-
-    if response.status_code == 200:
-        st.success("Solicitud de eliminación creada con éxito.")
-    else:
-        st.error("Error al crear la solicitud de actualización.")
-    time.sleep(0.5) 
+    # Encolar el request para enviarlo a la API en segundo plano (se muestra de inmediato en las solicitudes)
+    submit(API_URL_CREATE_REQUEST, data, [(API_URL_REQUESTS, None, data)], label="solicitud de eliminación")
+    flash("Solicitud de eliminación registrada. Se enviará al servidor en segundo plano.")
     st.rerun()
         
+# Función para obtener la página actual descargando todas las estimaciones y filtrando localmente
+def get_local_page(search_term, paginator_key, default_page_size):
+    # Tabla compacta compartida entre sesiones (instantánea incremental o listado completo por versión)
+    df_estimations, version = load_estimations_frame()
+    if df_estimations is None:
+        return None
+
+    # Filtrar DataFrame según el término de búsqueda (con el índice de búsqueda de esta versión de los datos)
+    filtered_df = search_frame(df_estimations, search_term, ("estimations", version), ["structureType", "abutmentType"])
+
+    # Tomar solo las filas de la página actual
+    return paginate(filtered_df, paginator_key, default_page_size=default_page_size), len(filtered_df)
+
+# Función para obtener la página actual pidiendo al backend solo los registros de esa página
+def get_server_page(search_term, paginator_key, default_page_size):
+    page_size = get_page_size(paginator_key, default=default_page_size)
+    requested_page = get_requested_page(paginator_key)
+    result = load_estimations_page(requested_page, page_size, search_term)
+    if result is None:
+        return None
+
+    # El backend devolvió la lista completa en lugar de {"items", "total"} (no pagina): filtrar y paginar localmente
+    if isinstance(result, list):
+        return get_local_page(search_term, paginator_key, default_page_size)
+
+    # Si la página solicitada ya no existe (por ejemplo, tras una búsqueda), pedir la última página
+    current_page, _ = get_current_page(paginator_key, result["total"], page_size)
+    if current_page != requested_page:
+        result = load_estimations_page(current_page, page_size, search_term)
+        if result is None:
+            return None
+
+    return flatten_estimations(result["items"]), result["total"]
+
 # Si el usuario está en la página de creación de estimación, mostrar el formulario
 if st.session_state["create_project"]:
     handle_create_project()
@@ -233,13 +308,17 @@ if st.session_state["create_project"]:
 elif st.session_state["edit_project"]:
     handle_edit_project()
 
+# Si el usuario está en la estimación masiva, mostrar la carga de archivo
+elif st.session_state["batch_project"]:
+    handle_batch_project()
+
 else:
     # Mostrar título de sección
     st.title("Lista de Estimaciones")
 
     # Crear un contenedor para centrar los elementos
     with st.container():
-        search_col, create_col = st.columns([4, 1])  # Ajustar proporciones
+        search_col, create_col, batch_col, mode_col = st.columns([4, 1, 1, 1])  # Ajustar proporciones
 
         # Colocar la barra de búsqueda
         with search_col:
@@ -251,107 +330,91 @@ else:
                 st.session_state["create_project"] = True
                 st.rerun()
 
-    # Llamar a la API para obtener las estimaciones
-    response = requests.get(f"{base_url}/estimation")
-    
-    if response.status_code == 200:
-        estimaciones = response.json()
-        df_estimations = pd.DataFrame(estimaciones)  # Convertir a DataFrame
+        # Botón para la estimación masiva desde un archivo
+        with batch_col:
+            if st.button('Estimación Masiva'):
+                st.session_state["batch_project"] = True
+                st.rerun()
 
-        # Aplanar las columnas de input_list
-        df_estimations = df_estimations.join(pd.json_normalize(df_estimations['input_list'])).drop(columns=['input_list'])
+        # Selector entre la tabla por filas y la cuadrícula
+        with mode_col:
+            grid_mode = use_grid(PAGINATOR_KEY)
 
-        # Filtrar DataFrame según el término de búsqueda
-        if search_term:
-            filtered_df = df_estimations[df_estimations['structureType'].str.contains(search_term, case=False) | 
-                                          df_estimations['abutmentType'].str.contains(search_term, case=False)]
-        else:
-            filtered_df = df_estimations  # Si no hay búsqueda, usar el DataFrame original
+    # La cuadrícula usa su propio paginador con páginas más grandes
+    paginator_key, default_page_size = paginator_settings(PAGINATOR_KEY, grid_mode, 10)
 
-        # Verificar si el DataFrame filtrado está vacío
-        if filtered_df.empty:
-            st.warning("No se encontraron resultados para el término de búsqueda.")
-            current_page_data = pd.DataFrame()  # Mostrar un DataFrame vacío para que no cause errores
+    # Obtener solo la página actual (filtrada en el servidor o a partir del listado completo)
+    with span("data.page", server_paging=ESTIMATIONS_SERVER_PAGING, delta_sync=ESTIMATIONS_DELTA_SYNC):
+        if ESTIMATIONS_SERVER_PAGING and server_paging_supported(API_URL_ESTIMATIONS):
+            page = get_server_page(search_term, paginator_key, default_page_size)
         else:
-            # Paginador: Dividir DataFrame filtrado en "páginas"
-            def split_frame(input_df, rows):
-                return [input_df.loc[i: i + rows - 1, :] for i in range(0, len(input_df), rows)]
-
-            # Fijar el tamaño de página a 10 registros
-            batch_size = 10
-            total_pages = math.ceil(len(filtered_df) / batch_size)  # Calcular total de páginas según el DataFrame filtrado
-
-            # Establecer la página actual en session_state (solo la primera vez)
-            if "current_page" not in st.session_state:
-                st.session_state["current_page"] = 1
-
-            # Asegurarse de que la página actual no exceda el número total de páginas
-            if st.session_state["current_page"] > total_pages:
-                st.session_state["current_page"] = total_pages
-
-            current_page = st.session_state["current_page"]
-
-            # Ajustar el contenedor para mayor tamaño de tabla
-            with st.container():
-                header_cols = st.columns([2, 2, 2, 2, 2, 2, 2])  # Ajustar el ancho de las columnas
-                header_cols[0].write("Tipo de Superestructura")
-                header_cols[1].write("Tipo de Estribo")
-                header_cols[2].write("Ancho Total")
-                header_cols[3].write("Número de Tramos")
-                header_cols[4].write("Longitud Total")
-                header_cols[5].write("Costo Total")  
-                header_cols[6].write("Acciones")   # Columna para los botones de acciones
-
-                # Dividir el DataFrame filtrado en páginas
-                pages = split_frame(filtered_df, batch_size)
-
-                # Asegurarse de que la página actual no exceda el número total de páginas
-                if current_page > total_pages:
-                    current_page = total_pages
-                    st.session_state["current_page"] = current_page
-
-                current_page_data = pages[current_page - 1] if current_page <= total_pages else pd.DataFrame()
-
-                # Mostrar los datos del current_page_data
-                for index, row in current_page_data.iterrows():
-                    cols = st.columns([2, 2, 2, 2, 2, 2, 1, 1])  # Ajustar las columnas
-
-                    # Mostrar datos de la estimación
-                    cols[0].text(row['structureType'])
-                    cols[1].text(row['abutmentType'])
-                    cols[2].text(row['total_Width'])
-                    cols[3].text(row['number_of_Spans'])
-                    cols[4].text(row['total_Length'])
-                    cols[5].text(row['total_Cost'])
-
-                     # Columna de acciones con botones separados
-                    with cols[6]:
-                        if st.button("✏️", key=f"edit_{row['id']}"):
-                           st.session_state["edit_project"] = True
-                           st.session_state["project_to_edit"] = row  # Guardar los datos de la fila completa
-                           st.rerun()  # Recargar la app para mostrar el formulario de edición
-
-                    with cols[7]:
-                        if st.button("🗑️", key=f"delete_{row['id']}"):
-                           handle_delete_project(row['id'])
-
-                # Mostrar selector de página y número de página actual debajo de la tabla
-                paginator = st.columns([2, 1])
-
-                with paginator[0]:
-                    st.markdown(f"Página **{current_page}** de **{total_pages}**")
-
-                # Cambiar la página usando un selector de número
-                with paginator[1]:
-                    st.number_input(
-                        "Seleccionar Página", 
-                        min_value=1, 
-                        max_value=total_pages if total_pages > 0 else 1,  # Asegurar que el máximo no sea 0
-                        value=current_page,
-                        step=1,
-                        key="page_selector",
-                        on_change=lambda: st.session_state.update({"current_page": st.session_state.page_selector}),
-                        label_visibility="collapsed"
-                    )
+            page = get_local_page(search_term, paginator_key, default_page_size)
+
+    if page is not None:
+        current_page_data, total_rows = page
+        show_stale_notice(API_URL_ESTIMATIONS)
+        show_outbox_status()
+
+        with span("render.table", mode="grid" if grid_mode else "rows", rows=len(current_page_data), total_rows=total_rows):
+            # Verificar si no hay resultados
+            if total_rows == 0:
+                st.warning("No se encontraron resultados para el término de búsqueda.")
+            elif grid_mode:
+                # Mostrar la página en una sola cuadrícula; las acciones se aplican a la fila seleccionada
+                selected = render_grid(current_page_data, TABLE_COLUMNS, f"{paginator_key}_table_{get_requested_page(paginator_key)}")
+
+                edit_col, delete_col, _ = st.columns([1, 1, 4])
+                with edit_col:
+                    # Las estimaciones que aún no confirmó el backend no se pueden editar ni eliminar
+                    provisional = not selected.empty and pd.isna(selected.iloc[0]['total_Cost'])
+                    if st.button("✏️ Editar", disabled=selected.empty or provisional):
+                        st.session_state["edit_project"] = True
+                        # Guardar los datos de la fila completa con tipos de Python (la tabla compacta usa tipos de numpy, que no se pueden enviar como JSON)
+                        st.session_state["project_to_edit"] = selected.iloc[[0]].to_dict("records")[0]
+                        st.rerun()  # Recargar la app para mostrar el formulario de edición
+                with delete_col:
+                    if st.button("🗑️ Eliminar", disabled=selected.empty or provisional):
+                        handle_delete_project(selected.iloc[0]['id'])
+
+                render_paginator(paginator_key, total_rows, page_size_options=GRID_PAGE_SIZE_OPTIONS)
+            else:
+                # Ajustar el contenedor para mayor tamaño de tabla
+                with st.container():
+                    header_cols = st.columns([2, 2, 2, 2, 2, 2, 2])  # Ajustar el ancho de las columnas
+                    header_cols[0].write("Tipo de Superestructura")
+                    header_cols[1].write("Tipo de Estribo")
+                    header_cols[2].write("Ancho Total")
+                    header_cols[3].write("Número de Tramos")
+                    header_cols[4].write("Longitud Total")
+                    header_cols[5].write("Costo Total")  
+                    header_cols[6].write("Acciones")   # Columna para los botones de acciones
+
+                    # Mostrar los datos del current_page_data
+                    for index, row in current_page_data.iterrows():
+                        cols = st.columns([2, 2, 2, 2, 2, 2, 1, 1])  # Ajustar las columnas
+
+                        # Mostrar datos de la estimación
+                        cols[0].text(row['structureType'])
+                        cols[1].text(row['abutmentType'])
+                        cols[2].text(row['total_Width'])
+                        cols[3].text(row['number_of_Spans'])
+                        cols[4].text(row['total_Length'])
+                        # Sin costo: estimación recién creada que el backend aún no confirmó
+                        provisional = pd.isna(row['total_Cost'])
+                        cols[5].text("Calculando..." if provisional else row['total_Cost'])
+
+                         # Columna de acciones con botones separados
+                        with cols[6]:
+                            if st.button("✏️", key=f"edit_{row['id']}", disabled=provisional):
+                               st.session_state["edit_project"] = True
+                               st.session_state["project_to_edit"] = row  # Guardar los datos de la fila completa
+                               st.rerun()  # Recargar la app para mostrar el formulario de edición
+
+                        with cols[7]:
+                            if st.button("🗑️", key=f"delete_{row['id']}", disabled=provisional):
+                               handle_delete_project(row['id'])
+
+                    # Mostrar selector de página y número de página actual debajo de la tabla
+                    render_paginator(paginator_key, total_rows)
     else:
         st.error("Error al obtener las estimaciones desde el backend.")
@@ -0,0 +1,69 @@
+import streamlit as st
+from utils.analytics import get_cost_aggregates
+from utils.data import API_URL_ESTIMATIONS, show_stale_notice
+from utils.frames import load_estimations_frame
+from utils.tracing import span
+
+# Dimensiones por las que se pueden agrupar los costos
+GROUP_OPTIONS = {
+    "structureType": "Tipo de Superestructura",
+    "abutmentType": "Tipo de Estribo"
+}
+
+# Función para formatear un costo para las métricas
+def format_cost(value):
+    return "-" if value != value else f"{value:,.2f}"
+
+st.title("Panel de Costos")
+
+with span("data.cost_aggregates"):
+    # Tabla compacta compartida entre sesiones; los agregados se calculan una vez por versión
+    df_estimations, version = load_estimations_frame()
+    aggregates = get_cost_aggregates(df_estimations, version) if df_estimations is not None else None
+
+if aggregates is None:
+    st.error("Error al cargar las estimaciones.")
+    st.stop()
+
+show_stale_notice(API_URL_ESTIMATIONS)
+
+summary = aggregates.summary()
+if summary["rows"] == 0:
+    st.info("No hay estimaciones registradas.")
+    st.stop()
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Estimaciones", f"{summary['rows']:,}")
+col2.metric("Costo Promedio", format_cost(summary["mean_cost"]))
+col3.metric("Costo Promedio por m²", format_cost(summary["mean_cost_per_m2"]))
+
+group_by = st.selectbox("Agrupar por", options=list(GROUP_OPTIONS), format_func=GROUP_OPTIONS.get, key="dashboard_group_by")
+
+with span("render.charts", group_by=group_by):
+    # Las gráficas solo reciben los agregados (una fila por grupo, año o intervalo)
+    by_group = aggregates.by_dimension(group_by).rename(columns={
+        group_by: GROUP_OPTIONS[group_by],
+        "cost_per_m2": "Costo por m²",
+        "cost_per_span": "Costo por Tramo",
+        "rows": "Estimaciones"
+    })
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Costo Promedio por m²")
+        st.bar_chart(by_group, x=GROUP_OPTIONS[group_by], y="Costo por m²")
+    with col2:
+        st.subheader("Costo Promedio por Tramo")
+        st.bar_chart(by_group, x=GROUP_OPTIONS[group_by], y="Costo por Tramo")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Costo Promedio por Año")
+        trend = aggregates.year_trend().rename(columns={"year": "Año", "mean_cost": "Costo Promedio"})
+        st.line_chart(trend, x="Año", y="Costo Promedio")
+    with col2:
+        st.subheader("Distribución del Costo Total")
+        distribution = aggregates.cost_distribution().rename(columns={"cost_from": "Costo Total", "rows": "Estimaciones"})
+        st.bar_chart(distribution, x="Costo Total", y="Estimaciones")
+
+    st.dataframe(by_group, hide_index=True, use_container_width=True)
@@ -1,189 +1,301 @@
 import streamlit as st
 import pandas as pd
-import requests
-import math
 from streamlit_cookies_controller import CookieController
-import time
+from utils.concurrency import run_parallel
+from utils.data import API_URL_REQUESTS, API_URL_USERS, load_dataset, show_stale_notice
+from utils.flash import flash
+from utils.grid import GRID_PAGE_SIZE_OPTIONS, paginator_settings, render_grid, use_grid
+from utils.optimistic import approval_changes, is_provisional, submit, with_changes
+from utils.outbox import show_outbox_status
+from utils.pagination import PAGE_SIZE_OPTIONS, paginate, render_paginator
+from utils.search import search_frame
+from utils.tracing import span
 
 cookie_controller = CookieController()
 
-# URLs de la API
-API_URL_REQUESTS = "https://tesis-backend-nxpy.onrender.com/request"
-API_URL_USERS = "https://tesis-backend-nxpy.onrender.com/user"
+# Clave del paginador de esta vista
+PAGINATOR_KEY = "requests"
+
+# Columnas mostradas en la cuadrícula de solicitudes
+TABLE_COLUMNS = {
+    "request_type": "Tipo de Solicitud",
+    "solicitante": "Solicitante",
+    "status": "Estado",
+    "date": "Fecha de Solicitud"
+}
+
+# Solicitudes seleccionadas para aprobar o rechazar en bloque
+SELECTION_KEY = "selected_requests"
+if SELECTION_KEY not in st.session_state:
+    st.session_state[SELECTION_KEY] = set()
 
 user_role = cookie_controller.get('role')
 user_id = cookie_controller.get('user_id')
 
-# Función para obtener solicitudes de la API
-def get_requests():
-    response = requests.get(API_URL_REQUESTS)
-    if response.status_code == 200:
-        return pd.DataFrame(response.json())
-    else:
+# Función para obtener solicitudes y usuarios de la API en paralelo
+def get_requests_and_users():
+    (requests_data, requests_version), (users_data, users_version) = run_parallel(
+        lambda: load_dataset(API_URL_REQUESTS),
+        lambda: load_dataset(API_URL_USERS)
+    )
+
+    # Aplicar los cambios locales que aún no están en los listados del backend
+    requests_data, requests_version = with_changes(API_URL_REQUESTS, requests_data, requests_version)
+    users_data, users_version = with_changes(API_URL_USERS, users_data, users_version)
+    if requests_data is None:
         st.error("Error al obtener solicitudes de la API.")
-        return pd.DataFrame()
-
-# Función para obtener usuarios de la API
-def get_users():
-    response = requests.get(API_URL_USERS)
-    if response.status_code == 200:
-        return pd.DataFrame(response.json())
-    else:
+    if users_data is None:
         st.error("Error al obtener usuarios de la API.")
-        return pd.DataFrame()
+    return requests_data or [], requests_version, users_data or [], users_version
+
+# Función para construir la tabla de solicitudes con el nombre del solicitante.
+# Se guarda en caché por versión de ambos conjuntos de datos y por usuario filtrado,
+# para que los cambios de página y las búsquedas no repitan la unión. La tabla se comparte
+# entre sesiones sin copiarla, por lo que la vista solo debe leerla.
+@st.cache_resource(max_entries=8, show_spinner=False)
+def build_requests_frame(requests_version, users_version, filter_user_id, _requests_data, _users_data):
+    with span("transform.build_requests_frame", rows=len(_requests_data)):
+        df_requests = pd.DataFrame(_requests_data)
+        df_users = pd.DataFrame(_users_data)
+        if df_requests.empty:
+            return df_requests
+
+        # Filtrar solicitudes según el rol del usuario
+        if filter_user_id is not None:
+            # Si el rol es 'usuario', solo mostrar las solicitudes cuyo 'user_id' coincida con el 'user_id' en la cookie
+            df_requests = df_requests[df_requests['user_id'] == filter_user_id]
+
+        # Invertir el DataFrame para que el último registro sea el primero
+        df_requests = df_requests.iloc[::-1].reset_index(drop=True)
+
+        # Mapear `user_id` a `name` en df_requests
+        user_dict = df_users.set_index("id")["name"].to_dict() if not df_users.empty else {}
+        df_requests["solicitante"] = df_requests["user_id"].map(user_dict)
+        return df_requests
+
+# Función para obtener los cambios locales de un cambio de estado: el estado de la solicitud y, al aprobarla,
+# la edición o eliminación de la estimación asociada (lo mismo que hace el backend al aprobar)
+def status_changes(request, new_status):
+    changes = [(API_URL_REQUESTS, request["id"], {"status": new_status})]
+    if new_status == "Aprobado" and request.get("status") != "Aprobado":
+        changes += approval_changes(request)
+    return changes
+
+# Función para enviar el cambio de estado de una solicitud (solo el campo `status`).
+# El cambio se aplica de inmediato sobre los listados locales y se envía a la API en segundo plano;
+# si la API lo rechaza, se revierte.
+def send_request_status(request_id, new_status):
+    request = requests_by_id.get(request_id, {"id": request_id})
+    submit(
+        f"{API_URL_REQUESTS}/{request_id}",
+        {"status": new_status},
+        status_changes(request, new_status),
+        method="PUT",
+        label=f"solicitud {request_id}",
+        request_id=request_id
+    )
 
 # Función para actualizar el estado de la solicitud en la API
-def update_request_status(row, new_status):
-    # Convertir la fila a un diccionario
-    row_dict = row.to_dict()
-
-    # Cambiar el estado en el diccionario
-    row_dict['status'] = new_status
-
-    # Eliminar claves con valores no serializables (por ejemplo, NaN o valores complejos)
-    # Convertimos en cadenas o eliminamos cualquier valor no serializable
-    for key, value in row_dict.items():
-        if isinstance(value, pd.Timestamp):  # Si es un Timestamp, convertirlo a string
-            row_dict[key] = value.isoformat()
-        elif pd.isna(value):  # Si es NaN, lo eliminamos
-            row_dict[key] = None
-    
-    # Realizar la solicitud PUT para actualizar el estado
-    response = requests.put(f"{API_URL_REQUESTS}/{row_dict['id']}", json=row_dict)
-
-    if response.status_code == 200:
-        st.success(f"Solicitud actualizada con éxito.")
+def update_request_status(request_id, new_status):
+    send_request_status(request_id, new_status)
+    flash("Solicitud actualizada con éxito.")
+
+# Función para actualizar el estado de varias solicitudes.
+# El resultado de cada una se informa a esta sesión cuando se envía (las que fallen vuelven a quedar seleccionadas).
+def update_request_statuses(request_ids, new_status):
+    failures = []
+    for request_id in request_ids:
+        try:
+            send_request_status(request_id, new_status)
+        except Exception as e:
+            failures.append((request_id, e))
+        else:
+            deselect_request(request_id)
+
+    updated = len(request_ids) - len(failures)
+    if updated:
+        flash(f"{updated} solicitudes actualizadas a '{new_status}'.")
+    if failures:
+        detail = "; ".join(f"{request_id}: {error}" for request_id, error in failures)
+        flash(f"No se pudieron actualizar {len(failures)} solicitudes ({detail}).", "error")
+
+# Funciones para manejar la selección de solicitudes pendientes (se conserva entre páginas)
+def selection_key(request_id):
+    return f"select_{request_id}"
+
+def toggle_request(request_id):
+    if st.session_state[selection_key(request_id)]:
+        st.session_state[SELECTION_KEY].add(request_id)
     else:
-        st.error(f"Error al actualizar el estado de la solicitud: {response.status_code}")
+        st.session_state[SELECTION_KEY].discard(request_id)
 
-# Cargar datos
-df_requests = get_requests()
-# Filtrar solicitudes según el rol del usuario
-if user_role != 'admin':
-    # Si el rol es 'usuario', solo mostrar las solicitudes cuyo 'user_id' coincida con el 'user_id' en la cookie
-    df_requests = df_requests[df_requests['user_id'] == user_id]
+def select_requests(request_ids):
+    for request_id in request_ids:
+        st.session_state[SELECTION_KEY].add(request_id)
+        st.session_state[selection_key(request_id)] = True
 
-df_users = get_users()
+def deselect_request(request_id):
+    st.session_state[SELECTION_KEY].discard(request_id)
+    st.session_state[selection_key(request_id)] = False
 
-# Invertir el DataFrame para que el último registro sea el primero
-df_requests = df_requests.iloc[::-1].reset_index(drop=True)
+def clear_selection():
+    for request_id in list(st.session_state[SELECTION_KEY]):
+        deselect_request(request_id)
 
-# Mapear `user_id` a `name` en df_requests
-user_dict = df_users.set_index("id")["name"].to_dict()
-df_requests["solicitante"] = df_requests["user_id"].map(user_dict)
+# Cargar datos
+with span("data.requests_and_users"):
+    requests_data, requests_version, users_data, users_version = get_requests_and_users()
+    df_requests = build_requests_frame(
+        requests_version,
+        users_version,
+        None if user_role == 'admin' else user_id,
+        requests_data,
+        users_data
+    )
+    requests_by_id = {request.get("id"): request for request in requests_data}
 
 # Título de la página
 st.title("Lista de Solicitudes")
+show_stale_notice(API_URL_REQUESTS, API_URL_USERS)
+failed_writes = show_outbox_status()
+
+# Las solicitudes cuyo cambio de estado no se pudo guardar vuelven a quedar seleccionadas para reintentarlo
+select_requests([write["request_id"] for write in failed_writes if write.get("request_id")])
 
 # Search bar para buscar por tipo de solicitud, nombre de solicitante o estado
 with st.container():
-    search_col, _ = st.columns([4, 1])
+    search_col, mode_col = st.columns([4, 1])
 
     with search_col:
-        search_term = st.text_input("Buscar por tipo de solicitud o solicitante...", key="search", placeholder="Buscar por tipo de solicitud, estado o solicitante...", label_visibility="collapsed")
+        # Al cambiar la búsqueda se descarta la selección (podría incluir solicitudes que ya no se ven)
+        search_term = st.text_input("Buscar por tipo de solicitud o solicitante...", key="search", placeholder="Buscar por tipo de solicitud, estado o solicitante...", label_visibility="collapsed", on_change=clear_selection)
+
+    # Selector entre la tabla por filas y la cuadrícula
+    with mode_col:
+        grid_mode = use_grid(PAGINATOR_KEY)
+
+# La cuadrícula usa su propio paginador con páginas más grandes
+paginator_key, default_page_size = paginator_settings(PAGINATOR_KEY, grid_mode, 5)
 
 # Filtrar DataFrame según el término de búsqueda
-if search_term:
-    filtered_df = df_requests[
-        df_requests['request_type'].str.contains(search_term, case=False) | 
-        df_requests['solicitante'].str.contains(search_term, case=False) |
-        df_requests['status'].str.contains(search_term, case=False)
-    ]
-else:
-    filtered_df = df_requests
+# El índice depende de ambas versiones de los datos y del filtro por usuario
+filtered_df = search_frame(
+    df_requests,
+    search_term,
+    ("requests", requests_version, users_version, user_role, user_id),
+    ["request_type", "solicitante", "status"]
+)
 
 # Verificar si el DataFrame filtrado está vacío
 if filtered_df.empty:
     st.warning("No se encontraron solicitudes que coincidan con la búsqueda.")
 else:
-    # Paginador: Dividir DataFrame filtrado en "páginas"
-    def split_frame(input_df, rows):
-        return [input_df.loc[i: i + rows - 1, :] for i in range(0, len(input_df), rows)]
-
-    batch_size = 5
-    total_pages = math.ceil(len(filtered_df) / batch_size)
-
-    if "current_page" not in st.session_state:
-        st.session_state["current_page"] = 1
-
-    def update_page():
-        st.session_state["current_page"] = st.session_state["page_selector"]
-
-    if st.session_state["current_page"] > total_pages and total_pages > 0:
-        st.session_state["current_page"] = total_pages
-
-    current_page = st.session_state["current_page"]
-
-    with st.container():
-        header_cols = st.columns([3, 3, 3, 3, 1, 1, 1])
-        header_cols[0].write("Tipo de Solicitud")
-        header_cols[1].write("Solicitante")
-        header_cols[2].write("Estado")
-        header_cols[3].write("Fecha de Solicitud")
-        header_cols[4].write("Aprobar")
-        header_cols[5].write("Rechazar")
-        header_cols[6].write("Ver")
-
-        pages = split_frame(filtered_df, batch_size)
-
-        if current_page > total_pages:
-            current_page = total_pages
-            st.session_state["current_page"] = current_page
-
-        current_page_data = pages[current_page - 1] if current_page <= total_pages else pd.DataFrame()
-
-        # Mostrar datos de la página actual
-        for index, row in current_page_data.iterrows():
-            cols = st.columns([3, 3, 3, 3, 1, 1, 1])
-
-            cols[0].text(row['request_type'])
-            cols[1].text(row['solicitante'])
-            cols[2].text(row['status'])
-            cols[3].text(row['date'])
-
-            # Mostrar "Aprobar" y "Rechazar" solo si está "Pendiente"
-            if row['status'] == "Pendiente" and row['request_type'] in ["Edición", "Eliminación"] and user_role=='admin':
-                with cols[4]:
-                    if st.button("✔️", key=f"approve_{row['id']}"):
-                        update_request_status(row,'Aprobado')
-                        time.sleep(0.5) 
-                        st.rerun()
-                with cols[5]:
-                    if st.button("❌", key=f"reject_{row['id']}"):
-                        update_request_status(row,'Rechazado')
-                        time.sleep(0.5) 
-                        st.rerun()
-            else:
-                cols[4].text("-")
-                cols[5].text("-")
-
-            # Mostrar "Ver" solo si es de tipo "Edición" (sin importar el estado)
-            if row['request_type'] == "Edición":
-                with cols[6]:
-                    if st.button("👁️", key=f"view_{row['id']}"):
-                        # Almacenar el `request_id` seleccionado para mostrar detalles
-                        st.session_state["selected_request"] = row
-                        st.rerun()
-            else:
-                cols[6].text("-")
-
-    # Paginador de la página
-    paginator = st.columns([2, 1])
-
-    with paginator[0]:
-        st.markdown(f"Página **{current_page}** de **{total_pages}**")
-
-    with paginator[1]:
-        st.number_input(
-            "Seleccionar Página", 
-            min_value=1, 
-            max_value=total_pages if total_pages > 0 else 1,
-            value=current_page,
-            step=1,
-            key="page_selector",
-            on_change=update_page,
-            label_visibility="collapsed"
-        )
+    # Solicitudes pendientes que el administrador puede aprobar o rechazar (no las recién creadas que el backend aún no confirmó)
+    actionable = (
+        (filtered_df['status'] == "Pendiente")
+        & filtered_df['request_type'].isin(["Edición", "Eliminación"])
+        & ~filtered_df['id'].map(is_provisional)
+    )
+
+    # Quitar de la selección las solicitudes que ya no están pendientes o no se ven (por ejemplo, ya atendidas)
+    for request_id in st.session_state[SELECTION_KEY] - set(filtered_df.loc[actionable, 'id']):
+        deselect_request(request_id)
+
+    # Acciones en bloque sobre las solicitudes seleccionadas
+    if user_role == 'admin' and actionable.any() and not grid_mode:
+        selected_ids = list(st.session_state[SELECTION_KEY])
+        bulk_cols = st.columns([2, 2, 2, 2])
+        with bulk_cols[0]:
+            st.button(f"Seleccionar pendientes ({int(actionable.sum())})", on_click=select_requests, args=(filtered_df.loc[actionable, 'id'].tolist(),))
+        with bulk_cols[1]:
+            st.button("Quitar selección", on_click=clear_selection, disabled=not selected_ids)
+        with bulk_cols[2]:
+            if st.button(f"✔️ Aprobar seleccionadas ({len(selected_ids)})", disabled=not selected_ids):
+                update_request_statuses(selected_ids, 'Aprobado')
+                st.rerun()
+        with bulk_cols[3]:
+            if st.button(f"❌ Rechazar seleccionadas ({len(selected_ids)})", disabled=not selected_ids):
+                update_request_statuses(selected_ids, 'Rechazado')
+                st.rerun()
+
+    # Tomar solo las filas de la página actual
+    current_page_data = paginate(filtered_df, paginator_key, default_page_size=default_page_size)
+    current_page_actionable = actionable.loc[current_page_data.index]
+
+    with span("render.table", mode="grid" if grid_mode else "rows", rows=len(current_page_data), total_rows=len(filtered_df)):
+        if grid_mode:
+            # Mostrar la página en una sola cuadrícula; las acciones se aplican a las filas seleccionadas
+            selected = render_grid(current_page_data, TABLE_COLUMNS, f"{paginator_key}_table_{requests_version}", selection_mode="multi-row")
+            selected_ids = selected.loc[current_page_actionable.loc[selected.index], 'id'].tolist() if user_role == 'admin' else []
+
+            action_cols = st.columns([2, 2, 1, 3])
+            with action_cols[0]:
+                if st.button(f"✔️ Aprobar ({len(selected_ids)})", disabled=not selected_ids):
+                    update_request_statuses(selected_ids, 'Aprobado')
+                    st.rerun()
+            with action_cols[1]:
+                if st.button(f"❌ Rechazar ({len(selected_ids)})", disabled=not selected_ids):
+                    update_request_statuses(selected_ids, 'Rechazado')
+                    st.rerun()
+            with action_cols[2]:
+                # "Ver" solo está disponible con una única solicitud de tipo "Edición" seleccionada
+                can_view = len(selected) == 1 and selected.iloc[0]['request_type'] == "Edición"
+                if st.button("👁️ Ver", disabled=not can_view):
+                    st.session_state["selected_request"] = selected.iloc[0]
+
+        else:
+            with st.container():
+                header_cols = st.columns([1, 3, 3, 3, 3, 1, 1, 1])
+                header_cols[0].write("Seleccionar")
+                header_cols[1].write("Tipo de Solicitud")
+                header_cols[2].write("Solicitante")
+                header_cols[3].write("Estado")
+                header_cols[4].write("Fecha de Solicitud")
+                header_cols[5].write("Aprobar")
+                header_cols[6].write("Rechazar")
+                header_cols[7].write("Ver")
+
+                # Mostrar datos de la página actual
+                for index, row in current_page_data.iterrows():
+                    cols = st.columns([1, 3, 3, 3, 3, 1, 1, 1])
+
+                    cols[1].text(row['request_type'])
+                    cols[2].text(row['solicitante'])
+                    cols[3].text(row['status'])
+                    cols[4].text(row['date'])
+
+                    # Mostrar selección, "Aprobar" y "Rechazar" solo si está "Pendiente"
+                    if current_page_actionable[index] and user_role=='admin':
+                        with cols[0]:
+                            key = selection_key(row['id'])
+                            if key not in st.session_state:
+                                st.session_state[key] = row['id'] in st.session_state[SELECTION_KEY]
+                            st.checkbox("Seleccionar", key=key, on_change=toggle_request, args=(row['id'],), label_visibility="collapsed")
+                        with cols[5]:
+                            if st.button("✔️", key=f"approve_{row['id']}"):
+                                update_request_status(row['id'], 'Aprobado')
+                                st.rerun()
+                        with cols[6]:
+                            if st.button("❌", key=f"reject_{row['id']}"):
+                                update_request_status(row['id'], 'Rechazado')
+                                st.rerun()
+                    else:
+                        cols[0].text("-")
+                        cols[5].text("-")
+                        cols[6].text("-")
+
+                    # Mostrar "Ver" solo si es de tipo "Edición" (sin importar el estado)
+                    if row['request_type'] == "Edición":
+                        with cols[7]:
+                            if st.button("👁️", key=f"view_{row['id']}"):
+                                # Almacenar el `request_id` seleccionado para mostrar detalles
+                                st.session_state["selected_request"] = row
+                                st.rerun()
+                    else:
+                        cols[7].text("-")
+
+        # Paginador de la página
+        render_paginator(paginator_key, len(filtered_df), page_size_options=GRID_PAGE_SIZE_OPTIONS if grid_mode else PAGE_SIZE_OPTIONS)
 
 # Detalles de solicitud seleccionada
 if "selected_request" in st.session_state and st.session_state["selected_request"] is not None:
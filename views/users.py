@@ -1,11 +1,27 @@
 import streamlit as st
 import pandas as pd
-import requests
-import math
-import time
-
-# URL de la API
-API_URL = "https://tesis-backend-nxpy.onrender.com/user"
+from utils.data import API_URL_USERS, load_dataset, show_stale_notice
+from utils.flash import flash
+from utils.grid import GRID_PAGE_SIZE_OPTIONS, paginator_settings, render_grid, use_grid
+from utils.optimistic import is_provisional, submit, with_changes
+from utils.outbox import show_outbox_status
+from utils.pagination import PAGE_SIZE_OPTIONS, paginate, render_paginator
+from utils.search import search_frame
+from utils.tracing import span
+
+# Endpoint de la API
+API_URL = API_URL_USERS
+
+# Clave del paginador de esta vista
+PAGINATOR_KEY = "users"
+
+# Columnas mostradas en la cuadrícula de usuarios
+TABLE_COLUMNS = {
+    "name": "Nombre Completo",
+    "email": "Correo",
+    "phone": "Celular",
+    "state": "Estado"
+}
 
 # Inicializar el estado de la sesión para la navegación y la edición
 if "create_user" not in st.session_state:
@@ -19,12 +35,13 @@ if "user_to_edit" not in st.session_state:
 
 # Función para obtener usuarios de la API
 def get_users():
-    response = requests.get(API_URL)
-    if response.status_code == 200:
-        return pd.DataFrame(response.json())
+    # Aplicar los cambios locales que aún no están en el listado del backend
+    data, version = with_changes(API_URL, *load_dataset(API_URL))
+    if data is not None:
+        return pd.DataFrame(data), version
     else:
         st.error("Error al obtener usuarios de la API.")
-        return pd.DataFrame()
+        return pd.DataFrame(), None
 
 #Función para resetear estado de la sesión
 def reset_session_state():
@@ -48,7 +65,9 @@ def handle_user_form():
         user_email = st.text_input("Correo:", user_data['email'])
         user_phone = st.text_input("Celular:", user_data['phone'])
         user_state = st.selectbox("Estado:", ["Activo", "Inactivo"], index=0 if "Activo" in user_data['state'] else 1)
-        user_password = st.text_input("Contraseña:", type='password', value=user_data['password'])
+        # La copia local de usuarios no guarda contraseñas: sin el backend, el campo aparece vacío
+        current_password = user_data.get('password')
+        user_password = st.text_input("Contraseña:", type='password', value=current_password if isinstance(current_password, str) else "")
     else:
         st.title("Crear Usuario")
         user_name = st.text_input("Nombre Completo:")
@@ -71,26 +90,22 @@ def handle_user_form():
                 "role": 'usuario'
             }
 
-            # Si es una edición, actualizar el usuario en la API
+            # Los cambios se muestran de inmediato y se envían a la API en segundo plano (se revierten si la API los rechaza)
             if is_edit:
+                # Actualizar el usuario en la API
                 user["id"] = user_data['id']
                 user["role"] = user_data['role']
-                response = requests.put(f"{API_URL}/{user_data['id']}", json=user)
-                if response.status_code == 200:
-                    st.success("Usuario editado exitosamente.")
-                    time.sleep(0.5) 
-                    reset_session_state()
-                else:
-                    st.error("Error al editar el usuario.")
+                # Con la contraseña vacía se conserva la actual
+                if not user_password:
+                    user.pop("password")
+                submit(f"{API_URL}/{user_data['id']}", user, [(API_URL, user_data['id'], user)], method="PUT", label=f"edición del usuario {user_data['id']}")
+                flash("Usuario editado exitosamente.")
+                reset_session_state()
             else:
                 # Crear el nuevo usuario en la API
-                response = requests.post(f"{API_URL}/create", json=user)
-                if response.status_code == 200:
-                    st.success("Usuario creado exitosamente.")
-                    time.sleep(0.5) 
-                    reset_session_state()
-                else:
-                    st.error("Error al crear el usuario.")
+                submit(f"{API_URL}/create", user, [(API_URL, None, user)], label="nuevo usuario")
+                flash("Usuario creado exitosamente.")
+                reset_session_state()
             
     with col2:
         if st.button("Cancelar"):
@@ -98,16 +113,13 @@ def handle_user_form():
 
 # Función para eliminar un usuario
 def delete_user(id):
-    response = requests.delete(f"{API_URL}/{id}")
-    if response.status_code == 200:
-        st.success(f"Usuario con correo {id} eliminado exitosamente.")
-    else:
-        st.error("Error al eliminar el usuario.")
-    time.sleep(0.5) 
+    submit(f"{API_URL}/{id}", {}, [(API_URL, id, None)], method="DELETE", label=f"eliminación del usuario {id}")
+    flash(f"Usuario con correo {id} eliminado exitosamente.")
     st.rerun()
 
 # Obtener usuarios de la API
-df_users = get_users()
+with span("data.users"):
+    df_users, users_version = get_users()
 df_users = df_users.iloc[::-1].reset_index(drop=True)
 
 # Si el usuario está en la página de creación o edición, mostrar el formulario
@@ -115,6 +127,8 @@ if st.session_state["create_user"] or st.session_state["edit_user"]:
     handle_user_form()
 else:
     st.title("Lista de Usuarios")
+    show_stale_notice(API_URL)
+    show_outbox_status()
 
     # Función para agregar el ícono de status
     def add_status_emojis(status):
@@ -123,7 +137,7 @@ else:
     df_users['state'] = df_users['state'].apply(add_status_emojis)
 
     with st.container():
-        search_col, create_col = st.columns([4, 1])
+        search_col, create_col, mode_col = st.columns([4, 1, 1])
 
         with search_col:
             search_term = st.text_input("Buscar usuario (nombre o correo):", key="search", placeholder="Buscar usuario...", label_visibility="collapsed")
@@ -133,83 +147,69 @@ else:
                 st.session_state["create_user"] = True
                 st.rerun()
 
+        # Selector entre la tabla por filas y la cuadrícula
+        with mode_col:
+            grid_mode = use_grid(PAGINATOR_KEY)
+
+    # La cuadrícula usa su propio paginador con páginas más grandes
+    paginator_key, default_page_size = paginator_settings(PAGINATOR_KEY, grid_mode, 10)
+
     # Filtrar DataFrame según el término de búsqueda
-    if search_term:
-        filtered_df = df_users[df_users['name'].str.contains(search_term, case=False) | 
-                               df_users['email'].str.contains(search_term, case=False)]
-    else:
-        filtered_df = df_users
+    filtered_df = search_frame(df_users, search_term, ("users", users_version), ["name", "email"])
 
     # Verificar si el DataFrame filtrado está vacío
     if filtered_df.empty:
         st.warning("No se encontraron usuarios que coincidan con la búsqueda.")
     else:
-        # Paginador: Dividir DataFrame filtrado en "páginas"
-        def split_frame(input_df, rows):
-            return [input_df.loc[i: i + rows - 1, :] for i in range(0, len(input_df), rows)]
-
-        batch_size = 10
-        total_pages = math.ceil(len(filtered_df) / batch_size)
-
-        if "current_page" not in st.session_state:
-            st.session_state["current_page"] = 1
-
-        def update_page():
-            st.session_state["current_page"] = st.session_state["page_selector"]
-
-        if st.session_state["current_page"] > total_pages and total_pages > 0:
-            st.session_state["current_page"] = total_pages
-
-        current_page = st.session_state["current_page"]
-
-        with st.container():
-            header_cols = st.columns([4, 4, 4, 4, 1, 1])
-            header_cols[0].write("Nombre Completo")
-            header_cols[1].write("Correo")
-            header_cols[2].write("Celular")
-            header_cols[3].write("Estado")
-            header_cols[4].write("Editar")
-            header_cols[5].write("Eliminar")
-
-            pages = split_frame(filtered_df, batch_size)
-
-            if current_page > total_pages:
-                current_page = total_pages
-                st.session_state["current_page"] = current_page
-
-            current_page_data = pages[current_page - 1] if current_page <= total_pages else pd.DataFrame()
-
-            for index, row in current_page_data.iterrows():
-                cols = st.columns([4, 4, 4, 4, 1, 1])
-
-                cols[0].text(row['name'])
-                cols[1].text(row['email'])
-                cols[2].text(row['phone'])
-                cols[3].text(row['state'])
-
-                with cols[4]:
-                    if st.button("✏️", key=f"edit_{row['email']}"):
+        # Tomar solo las filas de la página actual
+        current_page_data = paginate(filtered_df, paginator_key, default_page_size=default_page_size)
+
+        with span("render.table", mode="grid" if grid_mode else "rows", rows=len(current_page_data), total_rows=len(filtered_df)):
+            if grid_mode:
+                # Mostrar la página en una sola cuadrícula; las acciones se aplican a la fila seleccionada
+                selected = render_grid(current_page_data, TABLE_COLUMNS, f"{paginator_key}_table_{users_version}")
+
+                # Los usuarios que el backend aún no confirmó no se pueden editar ni eliminar
+                provisional = not selected.empty and is_provisional(selected.iloc[0]['id'])
+                edit_col, delete_col, _ = st.columns([1, 1, 4])
+                with edit_col:
+                    if st.button("✏️ Editar", disabled=selected.empty or provisional):
                         st.session_state["edit_user"] = True
-                        st.session_state["user_to_edit"] = row
+                        st.session_state["user_to_edit"] = selected.iloc[[0]].to_dict("records")[0]
                         st.rerun()
+                with delete_col:
+                    if st.button("🗑️ Eliminar", disabled=selected.empty or provisional):
+                        delete_user(selected.iloc[0]['id'])
 
-                with cols[5]:
-                    if st.button("🗑️", key=f"delete_{row['id']}"):
-                        delete_user(row['id'])
-
-        paginator = st.columns([2, 1])
-
-        with paginator[0]:
-            st.markdown(f"Página **{current_page}** de **{total_pages}**")
-
-        with paginator[1]:
-            st.number_input(
-                "Seleccionar Página", 
-                min_value=1, 
-                max_value=total_pages if total_pages > 0 else 1,
-                value=current_page,
-                step=1,
-                key="page_selector",
-                on_change=update_page,
-                label_visibility="collapsed"
-            )
+            else:
+                with st.container():
+                    header_cols = st.columns([4, 4, 4, 4, 1, 1])
+                    header_cols[0].write("Nombre Completo")
+                    header_cols[1].write("Correo")
+                    header_cols[2].write("Celular")
+                    header_cols[3].write("Estado")
+                    header_cols[4].write("Editar")
+                    header_cols[5].write("Eliminar")
+
+                    for index, row in current_page_data.iterrows():
+                        cols = st.columns([4, 4, 4, 4, 1, 1])
+
+                        cols[0].text(row['name'])
+                        cols[1].text(row['email'])
+                        cols[2].text(row['phone'])
+                        cols[3].text(row['state'])
+
+                        # Usuario recién creado que el backend aún no confirmó
+                        provisional = is_provisional(row['id'])
+
+                        with cols[4]:
+                            if st.button("✏️", key=f"edit_{row['email']}", disabled=provisional):
+                                st.session_state["edit_user"] = True
+                                st.session_state["user_to_edit"] = row
+                                st.rerun()
+
+                        with cols[5]:
+                            if st.button("🗑️", key=f"delete_{row['id']}", disabled=provisional):
+                                delete_user(row['id'])
+
+            render_paginator(paginator_key, len(filtered_df), page_size_options=GRID_PAGE_SIZE_OPTIONS if grid_mode else PAGE_SIZE_OPTIONS)